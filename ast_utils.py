@@ -0,0 +1,101 @@
+def iter_child_nodes(node):
+    """Yields the direct child nodes of an AST node: nested statements and expressions."""
+    node_type = node[0]
+
+    if node_type == "VAR_DECLARATION":
+        yield node[3]
+    elif node_type == "ASSIGNMENT":
+        yield node[2]
+    elif node_type == "INDEX_ASSIGNMENT":
+        yield node[2]
+        yield node[3]
+    elif node_type == "RETURN":
+        if node[1]:
+            yield node[1]
+    elif node_type == "IF":
+        yield node[1]
+        yield from node[2]
+        yield from node[3] or []
+    elif node_type == "WHILE":
+        yield node[1]
+        yield from node[2]
+    elif node_type == "FUNCTION_DEF":
+        yield from node[3]
+    elif node_type == "FUNCTION_CALL":
+        yield from node[2]
+    elif node_type == "BIN_OP":
+        yield node[2]
+        yield node[3]
+    elif node_type == "LIST_LITERAL":
+        if isinstance(node[1], list):
+            yield from node[1]
+    elif node_type == "LIST_INDEX":
+        yield node[2]
+    elif node_type == "METHOD_CALL":
+        yield from node[3]
+    elif node_type == "INTERPOLATED_STRING":
+        yield from (part for part in node[1] if isinstance(part, tuple))
+
+
+def walk(nodes):
+    """Yields every node of an AST or block, parents before their children."""
+    stack = list(reversed(nodes))
+    while stack:
+        node = stack.pop()
+        yield node
+        stack.extend(reversed(list(iter_child_nodes(node))))
+
+
+def count_nodes(nodes):
+    return sum(1 for _ in walk(nodes))
+
+
+class AstTransformer:
+    """Rebuilds an AST bottom-up, letting subclasses replace blocks, statements and expressions."""
+    def transform(self, ast):
+        return self.visit_block(ast)
+
+    def visit_block(self, nodes):
+        return [self.visit_statement(node) for node in nodes]
+
+    def visit_function_body(self, nodes):
+        return self.visit_block(nodes)
+
+    def visit_statement(self, node):
+        return self.rebuild(node)
+
+    def visit_expression(self, node):
+        return self.rebuild(node)
+
+    def rebuild(self, node):
+        node_type = node[0]
+        expression = self.visit_expression
+
+        if node_type == "VAR_DECLARATION":
+            return node_type, node[1], node[2], expression(node[3])
+        elif node_type == "ASSIGNMENT":
+            return node_type, node[1], expression(node[2])
+        elif node_type == "INDEX_ASSIGNMENT":
+            return node_type, node[1], expression(node[2]), expression(node[3])
+        elif node_type == "RETURN":
+            return node_type, expression(node[1]) if node[1] else node[1]
+        elif node_type == "IF":
+            false_block = self.visit_block(node[3]) if node[3] is not None else None
+            return node_type, expression(node[1]), self.visit_block(node[2]), false_block
+        elif node_type == "WHILE":
+            return node_type, expression(node[1]), self.visit_block(node[2])
+        elif node_type == "FUNCTION_DEF":
+            return node_type, node[1], node[2], self.visit_function_body(node[3]), node[4]
+        elif node_type == "FUNCTION_CALL":
+            return node_type, node[1], [expression(arg) for arg in node[2]]
+        elif node_type == "BIN_OP":
+            return node_type, node[1], expression(node[2]), expression(node[3])
+        elif node_type == "LIST_LITERAL" and isinstance(node[1], list):
+            return node_type, [expression(element) for element in node[1]]
+        elif node_type == "LIST_INDEX":
+            return node_type, node[1], expression(node[2])
+        elif node_type == "METHOD_CALL":
+            return node_type, node[1], node[2], [expression(arg) for arg in node[3]]
+        elif node_type == "INTERPOLATED_STRING":
+            return node_type, [expression(part) if isinstance(part, tuple) else part for part in node[1]]
+        return node
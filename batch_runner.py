@@ -0,0 +1,180 @@
+import argparse
+import glob
+import io
+import json
+import os
+import signal
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from evaluator import Evaluator
+from lexer import SinglePassLexer
+from program_cache import DEFAULT_DIRECTORY, ProgramCache
+from token_parser import TokenParser
+from type_checker import TypeChecker
+
+DEFAULT_PATTERN = "*.valo"
+
+# Set in every worker process by init_worker
+worker_cache = None
+worker_timeout = None
+timer_armed = False  # raise_timeout only raises while a script is running
+
+
+class ScriptTimeout(Exception):
+    pass
+
+
+class ScriptResult:
+    """Outcome of one script: what it printed, the error it stopped with and how long each step took."""
+    __slots__ = ("path", "output", "error", "timed_out", "compile_time", "run_time")
+
+    def __init__(self, path, output="", error=None, timed_out=False, compile_time=0.0, run_time=0.0):
+        self.path = path
+        self.output = output
+        self.error = error
+        self.timed_out = timed_out
+        self.compile_time = compile_time
+        self.run_time = run_time
+
+    @property
+    def ok(self):
+        return self.error is None
+
+    def as_dict(self):
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    def __repr__(self):
+        status = "ok" if self.ok else ("timeout" if self.timed_out else "error")
+        return f"ScriptResult({self.path!r}, {status})"
+
+
+def find_scripts(path, pattern=DEFAULT_PATTERN):
+    """Returns the scripts matching pattern under a directory, or the scripts listed in a manifest file.
+
+    A manifest has one path per line, relative to the manifest's directory; blank lines and lines
+    starting with # are ignored.
+    """
+    if os.path.isdir(path):
+        return sorted(glob.glob(os.path.join(path, "**", pattern), recursive=True))
+
+    base = os.path.dirname(path)
+    with open(path, encoding="utf-8") as manifest:
+        lines = [line.strip() for line in manifest]
+    return [os.path.join(base, line) for line in lines if line and not line.startswith("#")]
+
+
+def init_worker(cache_directory, timeout):
+    global worker_cache, worker_timeout
+    worker_cache = ProgramCache(cache_directory) if cache_directory else None
+    worker_timeout = timeout
+
+
+def raise_timeout(signum, frame):
+    # An alarm that was already on its way when the timer was disarmed is ignored
+    if timer_armed:
+        raise ScriptTimeout()
+
+
+def set_timer(seconds):
+    global timer_armed
+    timer_armed = bool(seconds)
+    signal.setitimer(signal.ITIMER_REAL, seconds)
+
+
+def run_script(path):
+    """Compiles and runs one script in the current process, using the settings from init_worker."""
+    result = ScriptResult(path)
+    output = io.StringIO()
+    # setitimer only exists on Unix; elsewhere scripts run without a time limit
+    use_timer = worker_timeout and hasattr(signal, "setitimer")
+    if use_timer:
+        previous_handler = signal.signal(signal.SIGALRM, raise_timeout)
+    start = time.perf_counter()
+    try:
+        try:
+            if use_timer:
+                set_timer(worker_timeout)
+            with open(path, encoding="utf-8") as source_file:
+                source = source_file.read()
+            if worker_cache is not None:
+                ast = worker_cache.compile(source)
+            else:
+                ast = TokenParser(SinglePassLexer(source).tokenize()).parse()
+                TypeChecker().check(ast)
+            compiled = time.perf_counter()
+            result.compile_time = compiled - start
+            try:
+                Evaluator(output=output).evaluate(ast)
+            finally:
+                result.run_time = time.perf_counter() - compiled
+        finally:
+            # Disarmed inside the outer try, so an alarm up to this point still ends up as a timeout below
+            if use_timer:
+                set_timer(0)
+    except ScriptTimeout:
+        result.timed_out = True
+        result.error = f"Timed out after {worker_timeout} s"
+    except Exception as ex:
+        result.error = f"{type(ex).__name__}: {ex}"
+    finally:
+        if use_timer:
+            signal.signal(signal.SIGALRM, previous_handler)
+    result.output = output.getvalue()
+    return result
+
+
+def run_batch(paths, workers=None, chunk_size=8, timeout=None, cache_directory=DEFAULT_DIRECTORY):
+    """Runs the scripts across a pool of worker processes and returns their ScriptResults in order.
+
+    Scripts are handed to the workers chunk_size at a time. timeout limits each script in seconds.
+    All workers compile through a ProgramCache in cache_directory, so a script compiled by one is a
+    cache hit for the others and for later batches; pass None to compile every script from source.
+    With workers=1 the scripts run in this process.
+    """
+    paths = list(paths)
+    workers = workers or os.cpu_count() or 1
+    if workers == 1:
+        init_worker(cache_directory, timeout)
+        return [run_script(path) for path in paths]
+    with ProcessPoolExecutor(workers, initializer=init_worker, initargs=(cache_directory, timeout)) as executor:
+        return list(executor.map(run_script, paths, chunksize=chunk_size))
+
+
+def main(arguments=None):
+    parser = argparse.ArgumentParser(description="Run many valolang scripts across a pool of processes.")
+    parser.add_argument("path", help="directory of scripts, or a manifest file listing one script per line")
+    parser.add_argument("--pattern", default=DEFAULT_PATTERN, help="file name pattern used in a directory")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes, the CPU count by default")
+    parser.add_argument("--chunk-size", type=int, default=8, help="scripts sent to a worker at a time")
+    parser.add_argument("--timeout", type=float, default=None, help="seconds each script may run")
+    parser.add_argument("--cache-dir", default=DEFAULT_DIRECTORY, help="compiled program cache shared by the workers")
+    parser.add_argument("--no-cache", action="store_true", help="compile every script from source")
+    parser.add_argument("--show-output", action="store_true", help="print what each script printed")
+    parser.add_argument("--json", help="write every result, including its output, to this file")
+    options = parser.parse_args(arguments)
+
+    paths = find_scripts(options.path, options.pattern)
+    start = time.perf_counter()
+    results = run_batch(paths, options.workers, options.chunk_size, options.timeout,
+                        None if options.no_cache else options.cache_dir)
+    elapsed = time.perf_counter() - start
+
+    for result in results:
+        status = "ok" if result.ok else ("timeout" if result.timed_out else "error")
+        total_ms = (result.compile_time + result.run_time) * 1000
+        print(f"{status:8} {total_ms:9.2f} ms  {result.path}" + (f"  {result.error}" if result.error else ""))
+        if options.show_output and result.output:
+            print(result.output, end="")
+    failures = sum(1 for result in results if not result.ok)
+    print(f"{len(results)} scripts, {failures} failed, {elapsed:.2f} s")
+
+    if options.json:
+        with open(options.json, "w", encoding="utf-8") as file:
+            json.dump([result.as_dict() for result in results], file, indent=2)
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
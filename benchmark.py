@@ -0,0 +1,739 @@
+import asyncio
+import contextlib
+import io
+import mmap
+import os
+import sys
+import tempfile
+import timeit
+import time
+import tracemalloc
+
+import list_builtins
+import parallel
+from bytecode import BytecodeCompiler
+from closure_compiler import ClosureEvaluator
+from control_flow import BREAK, CONTINUE, RETURN
+from evaluator import Evaluator
+from incremental import IncrementalDocument
+from inliner import FunctionInliner
+from lexer import Lexer, SinglePassLexer
+from optimizer import Optimizer
+from output_sinks import CallbackSink, FileSink, MemorySink
+from profiler import ProfilingEvaluator
+from program import Program
+from program_cache import ProgramCache
+from resolver import UNSET, Resolver
+from scheduler import Scheduler
+from token_parser import CompactTokenParser, TokenParser
+from transpiler import PythonTranspiler
+from type_checker import TypeChecker
+from typed_lists import BoolList, IntList, StrList
+from virtual_machine import VirtualMachine
+
+SCRIPT = """
+int add(int x, int y)
+    return x + y
+/* helper functions
+   /* nested */ still comment
+*/
+int i = 0
+list<int> values = [1, 2, 3, 4]
+while i < 10
+    i = add(i, 1) // increment
+    if i == 3
+        continue
+    print("Value of i: {i}")
+"""
+
+LOOP_SCRIPT = """
+int fib(int n)
+    if n < 2
+        return n
+    return fib(n - 1) + fib(n - 2)
+int total = 0
+int i = 0
+while i < 300
+    int j = 0
+    while j < 100
+        j = j + 1
+        if j == i
+            continue
+        total = total + (i * j)
+    i = i + 1
+print(total)
+print(fib(18))
+"""
+
+CONSTANT_SCRIPT = """
+int width = 60 * 2
+int height = 10 + 20
+bool verbose = false
+int area = 0
+int row = 0
+while row < height
+    int column = 0
+    while column < width
+        column = column + 1
+        if verbose
+            print("cell {row} {column}")
+        area = area + (2 * 3 - 5)
+    row = row + 1
+print("{area} of {width * height}")
+"""
+
+CALL_SCRIPT = """
+int square(int n)
+    return n * n
+int scale(int value, int factor)
+    return value * factor
+int unused(int n)
+    return n + 1
+int total = 0
+int i = 0
+while i < 20000
+    total = total + scale(square(i), 3)
+    i = i + 1
+print(total)
+"""
+
+CONTINUE_SCRIPT = """
+int counted = 0
+int skip = 0
+int i = 0
+while i < 50000
+    i = i + 1
+    skip = skip + 1
+    if skip == 3
+        skip = 0
+        continue
+    counted = counted + 1
+print(counted)
+"""
+
+RETURN_SCRIPT = """
+int depth(int n)
+    if n < 1
+        return 0
+    return depth(n - 1) + 1
+int calls = 0
+while calls < 30000
+    calls = calls + depth(150)
+print(calls)
+"""
+
+VARIABLE_SCRIPT = """
+int a = 1
+int b = 2
+int c = 0
+int i = 0
+while i < 30000
+    c = (a + b) + (c - a)
+    a = b
+    b = i
+    i = i + 1
+print(c)
+"""
+
+MEMO_SCRIPT = """
+int fib(int n)
+    if n < 2
+        return n
+    return fib(n - 1) + fib(n - 2)
+int count(int n)
+    int total = 0
+    while n > 0
+        total = total + (n * n)
+        n = n - 1
+    return total
+int i = 0
+int n = 0
+int sum = 0
+while i < 300
+    sum = sum + count(n)
+    n = n + 1
+    if n == 10
+        n = 0
+    i = i + 1
+print(sum)
+print(fib(20))
+"""
+
+DEEP_RECURSION_SCRIPT = """
+int depth(int n)
+    if n == 0
+        return 0
+    return depth(n - 1) + 1
+int sum_down(int n, int total)
+    if n == 0
+        return total
+    return sum_down(n - 1, total + n)
+print(depth(100000))
+print(sum_down(100000, 0))
+"""
+
+TEMPLATE_SCRIPT = """
+str name = "valo"
+int i = 0
+while i < 3000
+    str line = "{name}: {i} of {3000} ({i * 2} {{doubled}}) {name} {i + 1} {i - 1}"
+    i = i + 1
+print(line)
+"""
+
+LIST_LOOP_SCRIPT = """
+list<int> values = range(20000)
+list<int> shifted = range(20000)
+int total = 0
+int largest = 0
+bool found = false
+int i = 0
+while i < values.length()
+    total = total + values[i]
+    if values[i] > largest
+        largest = values[i]
+    if values[i] == 19999
+        found = true
+    shifted[i] = values[i] + 7
+    i = i + 1
+print(total, largest, found, shifted[19999])
+"""
+
+LIST_BUILTIN_SCRIPT = """
+list<int> values = range(20000)
+list<int> shifted = values.add(7)
+print(values.sum(), values.max(), values.contains(19999), shifted[19999])
+"""
+
+PARMAP_SCRIPT = """
+int work(int n)
+    int total = 0
+    int i = 0
+    while i < 1000
+        total = total + ((i * n) - total)
+        i = i + 1
+    return total
+list<int> results = parmap(work, range(200))
+print(results.sum())
+"""
+
+PRINT_SCRIPT = """
+int i = 0
+while i < 20000
+    print("line {i} of the report", i)
+    i = i + 1
+"""
+
+
+class BreakException(Exception):
+    pass
+
+
+class ContinueException(Exception):
+    pass
+
+
+class ReturnException(Exception):
+    def __init__(self, value):
+        self.value = value
+
+
+class ExceptionControlFlowEvaluator(Evaluator):
+    """The Evaluator with break, continue and return raised as exceptions, as it worked before
+    ControlSignal sentinels."""
+    def eval_nodes(self, ast, frame):
+        for node in ast:
+            self.eval_node(node, frame)
+
+    def eval_node(self, node, frame):
+        node_type = node[0]
+        if node_type == "IF":
+            _, condition, true_block, false_block = node
+            if self.eval_node(condition, frame):
+                self.eval_nodes(true_block, frame)
+            elif false_block:
+                self.eval_nodes(false_block, frame)
+        elif node_type == "WHILE":
+            _, condition, body = node
+            while self.eval_node(condition, frame):
+                try:
+                    self.eval_nodes(body, frame)
+                except BreakException:
+                    break
+                except ContinueException:
+                    continue
+        elif node_type == "RETURN":
+            raise ReturnException(self.eval_node(node[1], frame) if node[1] else None)
+        elif node_type == "CONTINUE":
+            raise ContinueException()
+        elif node_type == "BREAK":
+            raise BreakException()
+        else:
+            return super().eval_node(node, frame)
+
+    def call_function(self, name, body, frame_size, arg_values):
+        function_frame = arg_values + [UNSET] * (frame_size - len(arg_values))
+        try:
+            self.eval_nodes(body, function_frame)
+        except ReturnException as ex:
+            return ex.value
+        return None
+
+
+class SentinelControlFlowEvaluator(Evaluator):
+    """ExceptionControlFlowEvaluator with the Evaluator's ControlSignal sentinels instead of
+    exceptions; both pay the same extra call per node for overriding eval_node."""
+    def eval_node(self, node, frame):
+        node_type = node[0]
+        if node_type == "IF":
+            _, condition, true_block, false_block = node
+            if self.eval_node(condition, frame):
+                return self.eval_nodes(true_block, frame)
+            elif false_block:
+                return self.eval_nodes(false_block, frame)
+        elif node_type == "WHILE":
+            _, condition, body = node
+            while self.eval_node(condition, frame):
+                signal = self.eval_nodes(body, frame)
+                if signal is BREAK:
+                    break
+                elif signal is RETURN:
+                    return RETURN
+        elif node_type == "RETURN":
+            self.return_value = self.eval_node(node[1], frame) if node[1] else None
+            return RETURN
+        elif node_type == "CONTINUE":
+            return CONTINUE
+        elif node_type == "BREAK":
+            return BREAK
+        else:
+            return super().eval_node(node, frame)
+
+
+class DictScopeEvaluator(Evaluator):
+    """The Evaluator with variables looked up by name in a dict, as it worked before slot
+    resolution. Supports programs without functions."""
+    def evaluate(self, ast, variables=None):
+        self.eval_nodes(ast, dict(variables or {}))
+
+    def eval_node(self, node, frame):
+        node_type = node[0]
+        if node_type == "IDENTIFIER":
+            if node[1] not in frame:
+                raise NameError(f"Undefined variable '{node[1]}'")
+            return frame[node[1]]
+        elif node_type == "VAR_DECLARATION":
+            value = frame[node[2]] = self.eval_node(node[3], frame)
+            return value
+        elif node_type == "ASSIGNMENT":
+            value = frame[node[1]] = self.eval_node(node[2], frame)
+            return value
+        return super().eval_node(node, frame)
+
+
+class SlotScopeEvaluator(Evaluator):
+    """DictScopeEvaluator with the Evaluator's resolved frame slots instead of dicts; both pay the
+    same extra call per node for overriding eval_node."""
+    def eval_node(self, node, frame):
+        node_type = node[0]
+        if node_type == "IDENTIFIER":
+            value = frame[node[2]]
+            if value is UNSET:
+                raise NameError(f"Undefined variable '{node[1]}'")
+            return value
+        elif node_type == "VAR_DECLARATION":
+            value = frame[node[4]] = self.eval_node(node[3], frame)
+            return value
+        elif node_type == "ASSIGNMENT":
+            value = frame[node[3]] = self.eval_node(node[2], frame)
+            return value
+        return super().eval_node(node, frame)
+
+
+def parse(source):
+    return TokenParser(SinglePassLexer(source).tokenize()).parse()
+
+
+def best_time(function, repeat=5, number=1):
+    return min(timeit.repeat(function, repeat=repeat, number=number))
+
+
+def benchmark_lexers(copies=200):
+    source = SCRIPT * copies
+    rule_tokens = [(t.type, t.value, t.line, t.column) for t in Lexer(source).tokenize()]
+    single_pass_tokens = [(t.type, t.value, t.line, t.column) for t in SinglePassLexer(source).tokenize()]
+    assert rule_tokens == single_pass_tokens, "Lexers produced different token streams"
+
+    rule_time = best_time(lambda: Lexer(source).tokenize())
+    single_pass_time = best_time(lambda: SinglePassLexer(source).tokenize())
+    print(f"Lexing {len(rule_tokens)} tokens:")
+    print(f"  Lexer:           {rule_time * 1000:8.2f} ms")
+    print(f"  SinglePassLexer: {single_pass_time * 1000:8.2f} ms ({rule_time / single_pass_time:.1f}x)")
+
+
+def peak_memory(function):
+    tracemalloc.start()
+    try:
+        function()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def benchmark_streaming(copies=2000):
+    with tempfile.TemporaryFile() as file:
+        file.write((SCRIPT * copies).encode("utf-8"))
+        file.flush()
+
+        def tokenize_in_memory():
+            file.seek(0)
+            Lexer(file.read().decode("utf-8")).tokenize()
+
+        def tokenize_streaming():
+            with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+                for _ in SinglePassLexer().stream(buffer):
+                    pass
+
+        print(f"Peak memory while lexing {file.tell() // 1024} KiB of source:")
+        print(f"  Lexer.tokenize: {peak_memory(tokenize_in_memory) / 1024:10.1f} KiB")
+        print(f"  Lexer.stream:   {peak_memory(tokenize_streaming) / 1024:10.1f} KiB")
+
+
+def benchmark_compact_tokens(copies=2000):
+    source = SCRIPT * copies
+    tokens = SinglePassLexer(source).tokenize()
+    compact_tokens = SinglePassLexer(source).tokenize_compact()
+    assert TokenParser(tokens).parse() == CompactTokenParser(compact_tokens).parse()
+
+    print(f"Storing {len(tokens)} tokens:")
+    print(f"  list[LanguageToken]: {peak_memory(lambda: SinglePassLexer(source).tokenize()) / 1024:10.1f} KiB")
+    print(f"  CompactTokens:       {peak_memory(lambda: SinglePassLexer(source).tokenize_compact()) / 1024:10.1f} KiB")
+    print("Parsing:")
+    print(f"  TokenParser:         {best_time(lambda: TokenParser(tokens).parse()) * 1000:10.2f} ms")
+    print(f"  CompactTokenParser:  {best_time(lambda: CompactTokenParser(compact_tokens).parse()) * 1000:10.2f} ms")
+
+
+def benchmark_incremental(copies=(50, 500)):
+    print("Re-parsing after a one-character edit:")
+    for count in copies:
+        source = SCRIPT * count
+        document = IncrementalDocument(source)
+        line = len(document.lines) // 2
+        while "print" not in document.lines[line - 1]:
+            line += 1
+
+        def edit_incrementally():
+            document.edit(line, 4, line, 4, "x")
+            document.edit(line, 4, line, 5, "")
+
+        def reparse_fully():
+            TokenParser(SinglePassLexer(source).tokenize()).parse()
+
+        print(f"  {len(document.lines):6} lines: full {best_time(reparse_fully) * 1000:8.2f} ms, "
+              f"incremental {best_time(edit_incrementally) / 2 * 1000:6.3f} ms")
+
+
+def benchmark_engines(engines, source=LOOP_SCRIPT, repeat=3):
+    """Times each engine on the same AST and prints its speedup over the first one."""
+    ast = parse(source)
+    baseline = None
+    for name, run in engines.items():
+        with contextlib.redirect_stdout(io.StringIO()):
+            elapsed = best_time(lambda: run(ast), repeat=repeat)
+        baseline = baseline or elapsed
+        print(f"  {name:20} {elapsed * 1000:9.2f} ms ({baseline / elapsed:.1f}x)")
+
+
+def benchmark_closures():
+    print("Running loops and recursion:")
+    benchmark_engines({
+        "Evaluator": lambda ast: Evaluator().evaluate(ast),
+        "ClosureEvaluator": lambda ast: ClosureEvaluator().evaluate(ast),
+    })
+
+
+def benchmark_vm():
+    print("Running loops and recursion:")
+    benchmark_engines({
+        "Evaluator": lambda ast: Evaluator().evaluate(ast),
+        "VirtualMachine": lambda ast: VirtualMachine().evaluate(ast),
+    })
+
+
+def benchmark_transpiler():
+    print("Running loops and recursion:")
+    transpiler = PythonTranspiler()
+    benchmark_engines({
+        "Evaluator": lambda ast: Evaluator().evaluate(ast),
+        "PythonTranspiler": lambda ast: transpiler.evaluate(ast),
+    })
+
+
+def benchmark_optimizer():
+    optimizer = Optimizer()
+    optimizer.optimize(parse(CONSTANT_SCRIPT))
+    print(optimizer.report())
+    print("Running with constant expressions:")
+    benchmark_engines({
+        "Evaluator": lambda ast: Evaluator().evaluate(ast),
+        "Optimizer+Evaluator": lambda ast: Evaluator().evaluate(Optimizer().optimize(ast)),
+    }, CONSTANT_SCRIPT)
+
+
+def inline_functions(ast):
+    type_checker = TypeChecker()
+    type_checker.check(ast)
+    inliner = FunctionInliner(type_checker.function_signatures)
+    return inliner.inline(ast), inliner
+
+
+def benchmark_inliner():
+    print(inline_functions(parse(CALL_SCRIPT))[1].format_report())
+    print("Running small function calls:")
+    benchmark_engines({
+        "Evaluator": lambda ast: Evaluator().evaluate(ast),
+        "Inliner+Evaluator": lambda ast: Evaluator().evaluate(inline_functions(ast)[0]),
+    }, CALL_SCRIPT)
+
+
+def benchmark_control_flow():
+    # Overriding eval_node makes every valolang call nest deeper on the Python stack
+    recursion_limit = sys.getrecursionlimit()
+    sys.setrecursionlimit(max(recursion_limit, 5000))
+    try:
+        for title, source in (("Loop with continue:", CONTINUE_SCRIPT), ("Recursive returns:", RETURN_SCRIPT)):
+            print(title)
+            # Without memoization, so every recursive return runs
+            benchmark_engines({
+                "exceptions": lambda ast: ExceptionControlFlowEvaluator(memoize=False).evaluate(ast),
+                "sentinels": lambda ast: SentinelControlFlowEvaluator(memoize=False).evaluate(ast),
+                "Evaluator": lambda ast: Evaluator(memoize=False).evaluate(ast),
+            }, source)
+    finally:
+        sys.setrecursionlimit(recursion_limit)
+
+
+def benchmark_frames():
+    print("Variable-heavy loop:")
+    benchmark_engines({
+        "dict scopes": lambda ast: DictScopeEvaluator().evaluate(ast),
+        "slots": lambda ast: SlotScopeEvaluator().evaluate(ast),
+        "Evaluator": lambda ast: Evaluator().evaluate(ast),
+    }, VARIABLE_SCRIPT, repeat=10)
+    print("Resolving slots:")
+    ast = parse(VARIABLE_SCRIPT)
+    print(f"  {'Resolver':20} {best_time(lambda: Resolver().resolve(ast)) * 1000:9.2f} ms")
+
+
+def benchmark_memoization():
+    evaluator = Evaluator()
+    with contextlib.redirect_stdout(io.StringIO()):
+        evaluator.evaluate(parse(MEMO_SCRIPT))
+    for name, stats in evaluator.memo_stats().items():
+        print(f"  {name}: {stats['hits']} hits, {stats['misses']} misses, {stats['size']} cached")
+    print("Running pure functions:")
+    benchmark_engines({
+        "Evaluator": lambda ast: Evaluator(memoize=False).evaluate(ast),
+        "Memoizing Evaluator": lambda ast: Evaluator().evaluate(ast),
+    }, MEMO_SCRIPT)
+
+
+def benchmark_deep_recursion():
+    print("Recursing 100000 calls deep, with and without tail calls:")
+    ast = parse(DEEP_RECURSION_SCRIPT)
+    for name, run in (("Evaluator", Evaluator().evaluate), ("VirtualMachine", VirtualMachine().evaluate)):
+        output = io.StringIO()
+        try:
+            with contextlib.redirect_stdout(output):
+                elapsed = best_time(lambda: run(ast), repeat=1)
+            print(f"  {name:20} {elapsed * 1000:9.2f} ms, printed {output.getvalue().split()}")
+        except RecursionError:
+            print(f"  {name:20} RecursionError")
+
+
+def benchmark_templates(copies=300):
+    source = TEMPLATE_SCRIPT * copies
+    print(f"Parsing {copies} copies of a template-heavy script:")
+    print(f"  {'TokenParser':20} {best_time(lambda: parse(source)) * 1000:9.2f} ms")
+    print("Rendering templates in a loop:")
+    benchmark_engines({"Evaluator": lambda ast: Evaluator().evaluate(ast)}, TEMPLATE_SCRIPT)
+
+
+def benchmark_program_cache(copies=200):
+    source = LOOP_SCRIPT * copies
+    print(f"Front end for {copies} copies of the loop script:")
+
+    def front_end():
+        TypeChecker().check(TokenParser(SinglePassLexer(source).tokenize()).parse())
+
+    print(f"  {'lex+parse+check':20} {best_time(front_end) * 1000:9.2f} ms")
+    with tempfile.TemporaryDirectory() as directory:
+        cache = ProgramCache(directory)
+        cache.compile(source)
+        print(f"  {'ProgramCache hit':20} {best_time(lambda: cache.compile(source)) * 1000:9.2f} ms")
+        print(f"  {'cache file size':20} {cache.entries()[0][1] // 1024:9} KiB")
+
+
+def benchmark_typed_lists(size=1_000_000):
+    print(f"Memory for {size} elements:")
+    for name, build in (
+        ("list of int", lambda: list(range(size))),
+        ("IntList", lambda: IntList(range(size))),
+        ("list of bool", lambda: [index % 3 == 0 for index in range(size)]),
+        ("BoolList", lambda: BoolList(index % 3 == 0 for index in range(size))),
+        ("list of str", lambda: [str(index % 100) for index in range(size)]),
+        ("StrList", lambda: StrList(str(index % 100) for index in range(size))),
+    ):
+        print(f"  {name:20} {peak_memory(build) / 1024 / 1024:9.2f} MiB")
+
+
+def benchmark_list_builtins():
+    print("Summing, searching and shifting 20000 elements:")
+    loops, builtins = parse(LIST_LOOP_SCRIPT), parse(LIST_BUILTIN_SCRIPT)
+    numpy = list_builtins.numpy
+    for name, ast, use_numpy in (
+        ("hand-written loops", loops, False),
+        ("built-ins, Python", builtins, False),
+        ("built-ins, numpy", builtins, True),
+    ):
+        if use_numpy and numpy is None:
+            print(f"  {name:20} numpy is not installed")
+            continue
+        list_builtins.numpy = numpy if use_numpy else None
+        try:
+            with contextlib.redirect_stdout(io.StringIO()):
+                elapsed = best_time(lambda: Evaluator().evaluate(ast))
+        finally:
+            list_builtins.numpy = numpy
+        print(f"  {name:20} {elapsed * 1000:9.2f} ms")
+
+
+def benchmark_profiler():
+    print("Running loops and recursion with and without profiling:")
+    parser = TokenParser(SinglePassLexer(LOOP_SCRIPT).tokenize())
+    ast = parser.parse()
+    benchmark_engines({
+        "Evaluator": lambda _: Evaluator().evaluate(ast),
+        "ProfilingEvaluator": lambda _: ProfilingEvaluator(parser.node_positions).evaluate(ast),
+    })
+
+
+def benchmark_program(runs=200):
+    source = SCRIPT * 20
+    print(f"Running a {source.count(chr(10))}-line script {runs} times:")
+
+    def run_from_source():
+        for _ in range(runs):
+            ast = parse(source)
+            TypeChecker().check(ast)
+            Evaluator(output=io.StringIO()).evaluate(ast)
+    program = Program(source)
+
+    def run_compiled():
+        for _ in range(runs):
+            program.run(output=io.StringIO())
+    print(f"  {'from source':20} {best_time(run_from_source, repeat=3) * 1000:9.2f} ms")
+    print(f"  {'compiled Program':20} {best_time(run_compiled, repeat=3) * 1000:9.2f} ms")
+
+
+def benchmark_parmap(worker_counts=(1, 2, 4)):
+    print(f"parmap of a CPU-bound function over 200 values ({os.cpu_count()} CPUs):")
+    ast = parse(PARMAP_SCRIPT)
+    settings = parallel.THRESHOLD, parallel.WORKERS
+    try:
+        for workers in worker_counts:
+            parallel.configure(threshold=1, workers=workers)
+            parallel.parmap("work", [0], parallel.function_table(ast, "work"))  # Starts the pool outside the timing
+            with contextlib.redirect_stdout(io.StringIO()):
+                elapsed = best_time(lambda: Evaluator(memoize=False).evaluate(ast), repeat=3)
+            print(f"  {f'{workers} worker(s)':20} {elapsed * 1000:9.2f} ms")
+    finally:
+        parallel.configure(*settings)
+
+
+def benchmark_scheduler(tasks=8, time_slices=(0.001, 0.01)):
+    print(f"Running {tasks} loop scripts one after another and sharing one event loop:")
+    code = BytecodeCompiler().compile(parse(LOOP_SCRIPT))
+
+    def run_in_sequence():
+        for _ in range(tasks):
+            VirtualMachine(io.StringIO()).run(code)
+
+    print(f"  {'in sequence':20} {best_time(run_in_sequence, repeat=3) * 1000:9.2f} ms")
+
+    for time_slice in time_slices:
+        gaps = []
+
+        async def run_scheduled():
+            scheduler = Scheduler(time_slice)
+            for _ in range(tasks):
+                scheduler.add(LOOP_SCRIPT, output=io.StringIO())
+            running = asyncio.ensure_future(scheduler.run())
+            last = time.perf_counter()
+            while not running.done():  # How long another coroutine waits for its turn
+                await asyncio.sleep(0)
+                now = time.perf_counter()
+                gaps.append(now - last)
+                last = now
+
+        elapsed = best_time(lambda: asyncio.run(run_scheduled()), repeat=3)
+        gaps.sort()
+        print(f"  {f'{time_slice * 1000:g} ms slices':20} {elapsed * 1000:9.2f} ms, another coroutine waits "
+              f"{gaps[len(gaps) // 2] * 1000:.2f} ms (median), {gaps[-1] * 1000:.2f} ms (longest)")
+
+
+def benchmark_output_sinks():
+    print("Printing 20000 lines with Evaluator, VirtualMachine and ClosureEvaluator through each output:")
+    ast = parse(PRINT_SCRIPT)
+    with tempfile.TemporaryDirectory() as directory:
+        # Line buffered like a terminal, so every print reaches the operating system
+        with open(os.path.join(directory, "output.txt"), "w", encoding="utf-8", buffering=1) as stdout:
+            outputs = {
+                "sys.stdout": lambda: None,
+                "unbuffered FileSink": lambda: FileSink(stdout, buffer_size=0),
+                "FileSink": lambda: FileSink(stdout),
+                "CallbackSink": lambda: CallbackSink(stdout.write),
+                "io.StringIO": io.StringIO,
+                "MemorySink": MemorySink,
+            }
+            for name, make_output in outputs.items():
+                def run_engines():
+                    output = make_output()
+                    with contextlib.redirect_stdout(stdout):
+                        Evaluator(output=output).evaluate(ast)
+                        VirtualMachine(output).evaluate(ast)
+                        ClosureEvaluator(output).evaluate(ast)
+                    if output is not None:
+                        output.close()
+
+                print(f"  {name:20} {best_time(run_engines, repeat=3) * 1000:9.2f} ms")
+
+
+BENCHMARKS = {
+    "lexer": benchmark_lexers,
+    "streaming": benchmark_streaming,
+    "compact": benchmark_compact_tokens,
+    "incremental": benchmark_incremental,
+    "closures": benchmark_closures,
+    "vm": benchmark_vm,
+    "transpiler": benchmark_transpiler,
+    "optimizer": benchmark_optimizer,
+    "inliner": benchmark_inliner,
+    "control_flow": benchmark_control_flow,
+    "frames": benchmark_frames,
+    "memoization": benchmark_memoization,
+    "recursion": benchmark_deep_recursion,
+    "templates": benchmark_templates,
+    "cache": benchmark_program_cache,
+    "typed_lists": benchmark_typed_lists,
+    "list_builtins": benchmark_list_builtins,
+    "profiler": benchmark_profiler,
+    "program": benchmark_program,
+    "parmap": benchmark_parmap,
+    "scheduler": benchmark_scheduler,
+    "output": benchmark_output_sinks,
+}
+
+if __name__ == "__main__":
+    for name in sys.argv[1:] or BENCHMARKS:
+        BENCHMARKS[name]()
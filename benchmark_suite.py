@@ -0,0 +1,259 @@
+import argparse
+import contextlib
+import io
+import json
+import platform
+import random
+import statistics
+import sys
+import time
+import timeit
+
+from evaluator import Evaluator
+from lexer import Lexer
+from token_parser import TokenParser
+from type_checker import TypeChecker
+
+FORMAT_VERSION = 1
+PHASES = ("lex", "parse", "check", "evaluate")
+MIN_RUN_SECONDS = 0.02  # Fast phases are looped until one timed run takes at least this long
+
+
+def fib_program(n=20):
+    return f"""
+int fib(int n)
+    if n < 2
+        return n
+    return fib(n - 1) + fib(n - 2)
+print(fib({n}))
+"""
+
+
+def nested_loops_program(size=150):
+    return f"""
+int total = 0
+int i = 0
+while i < {size}
+    int j = 0
+    while j < {size}
+        if j == i
+            total = total + 1
+        total = total + (i * j)
+        j = j + 1
+    i = i + 1
+print(total)
+"""
+
+
+def interpolation_program(count=3000):
+    return f"""
+str name = "valo"
+int i = 0
+while i < {count}
+    print("{{name}} line {{i}} of {count}: {{i * 3}} and {{i + 1}}")
+    i = i + 1
+"""
+
+
+def list_program(size=1000, passes=20):
+    values = ", ".join(str(value * 7 % 101) for value in range(size))
+    return f"""
+list<int> values = [{values}]
+int total = 0
+int round = 0
+while round < {passes}
+    int i = 0
+    while i < {size}
+        total = total + values[i]
+        values[i] = values[i] + 1
+        i = i + 1
+    round = round + 1
+print(total)
+"""
+
+
+def call_chain_program(depth=60, calls=300):
+    """A chain of functions that each call the next one, called repeatedly with a changing argument."""
+    lines = [f"int step_{depth}(int n)", "    return n"]
+    for index in range(depth - 1, -1, -1):
+        lines.append(f"int step_{index}(int n)")
+        lines.append(f"    return step_{index + 1}(n + 1)")
+    lines.extend([
+        "int total = 0",
+        "int i = 0",
+        f"while i < {calls}",
+        "    total = total + step_0(i)",
+        "    i = i + 1",
+        "print(total)",
+    ])
+    return "\n".join(lines) + "\n"
+
+
+def generate_source(functions=200, seed=0):
+    """Returns a large type-correct program built from random but reproducible functions and calls."""
+    generator = random.Random(seed)
+    lines = []
+    for index in range(functions):
+        a, b, c = (generator.randint(1, 9) for _ in range(3))
+        operator = generator.choice(["+", "-", "*"])
+        lines.extend([
+            f"int function_{index}(int a, int b)",
+            f"    int x = a {operator} {a}",
+            "    int count = 0",
+            f"    while count < {c}",
+            "        if x > b",
+            "            x = x - b",
+            "        else",
+            f"            x = x + {b}",
+            "        count = count + 1",
+            "    return x * 2",
+        ])
+        values = ", ".join(str(generator.randint(0, 99)) for _ in range(generator.randint(3, 8)))
+        lines.extend([
+            f"list<int> values_{index} = [{values}]",
+            f"int result_{index} = function_{index}(values_{index}[0], {generator.randint(1, 50)})",
+            f"print(\"function_{index}: {{result_{index}}}\") // {generator.choice(['checked', 'sampled'])}",
+        ])
+    return "\n".join(lines) + "\n"
+
+
+PROGRAMS = {
+    "fib": fib_program,
+    "nested_loops": nested_loops_program,
+    "interpolation": interpolation_program,
+    "lists": list_program,
+    "call_chain": call_chain_program,
+    "generated": generate_source,
+}
+
+
+def summarize(times):
+    return {
+        "min": min(times),
+        "median": statistics.median(times),
+        "mean": statistics.mean(times),
+        "stdev": statistics.stdev(times) if len(times) > 1 else 0.0,
+        "max": max(times),
+        "runs": len(times),
+    }
+
+
+def measure(function, repeat):
+    """Returns the seconds per call of each of repeat timed runs."""
+    timer = timeit.Timer(function)
+    number = 1
+    elapsed = timer.timeit(number)
+    if elapsed < MIN_RUN_SECONDS:
+        number = int(MIN_RUN_SECONDS / max(elapsed, 1e-9)) + 1
+    return [elapsed / number for elapsed in timer.repeat(repeat=repeat, number=number)]
+
+
+def time_phases(source, repeat=5):
+    """Times each phase of running the source on its own, feeding it the result of the phase before.
+
+    Memoization is off, so that fib measures function calls rather than the memo cache.
+    Returns {phase: statistics of the seconds per run}.
+    """
+    tokens = Lexer(source).tokenize()
+    ast = TokenParser(tokens).parse()
+    TypeChecker().check(ast)
+
+    def evaluate():
+        with contextlib.redirect_stdout(io.StringIO()):
+            Evaluator(memoize=False).evaluate(ast)
+
+    timers = {
+        "lex": lambda: Lexer(source).tokenize(),
+        "parse": lambda: TokenParser(tokens).parse(),
+        "check": lambda: TypeChecker().check(ast),
+        "evaluate": evaluate,
+    }
+    return {phase: summarize(measure(timers[phase], repeat)) for phase in PHASES}
+
+
+def run_suite(names=None, repeat=5):
+    results = {
+        "format_version": FORMAT_VERSION,
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "repeat": repeat,
+        "programs": {},
+    }
+    for name in names or PROGRAMS:
+        source = PROGRAMS[name]()
+        results["programs"][name] = {"source_lines": source.count("\n"), "phases": time_phases(source, repeat)}
+    return results
+
+
+def format_results(results):
+    lines = [f"{'program':16} {'phase':9} {'min ms':>10} {'median ms':>10} {'stdev ms':>10}"]
+    for name, program in results["programs"].items():
+        for phase, stats in program["phases"].items():
+            lines.append(f"{name:16} {phase:9} {stats['min'] * 1000:10.3f} {stats['median'] * 1000:10.3f} "
+                         f"{stats['stdev'] * 1000:10.3f}")
+    return "\n".join(lines)
+
+
+def compare(baseline, results, threshold=1.2):
+    """Compares the median times of two runs and returns the report lines and the regressions.
+
+    A phase regresses when its median is more than threshold times the baseline median.
+    """
+    lines = [f"{'program':16} {'phase':9} {'before ms':>10} {'after ms':>10} {'ratio':>7}"]
+    regressions = []
+    for name, program in results["programs"].items():
+        if name not in baseline["programs"]:
+            continue
+        for phase, stats in program["phases"].items():
+            before = baseline["programs"][name]["phases"].get(phase)
+            if before is None:
+                continue
+            ratio = stats["median"] / before["median"] if before["median"] else float("inf")
+            marker = ""
+            if ratio > threshold:
+                marker = "  slower"
+                regressions.append((name, phase, ratio))
+            lines.append(f"{name:16} {phase:9} {before['median'] * 1000:10.3f} {stats['median'] * 1000:10.3f} "
+                         f"{ratio:7.2f}{marker}")
+    return lines, regressions
+
+
+def load_results(path):
+    with open(path, encoding="utf-8") as file:
+        results = json.load(file)
+    if results.get("format_version") != FORMAT_VERSION:
+        raise ValueError(f"{path} has benchmark format {results.get('format_version')}, expected {FORMAT_VERSION}")
+    return results
+
+
+def main(arguments=None):
+    parser = argparse.ArgumentParser(
+        description="Time the lexer, parser, type checker and evaluator on valolang programs.")
+    parser.add_argument("programs", nargs="*", help=f"programs to run, all by default: {', '.join(PROGRAMS)}")
+    parser.add_argument("--repeat", type=int, default=5, help="timed runs of each phase")
+    parser.add_argument("--save", help="write the results as JSON to this file")
+    parser.add_argument("--compare", help="compare the results with a JSON file saved earlier")
+    parser.add_argument("--threshold", type=float, default=1.2, help="median ratio reported as a regression")
+    options = parser.parse_args(arguments)
+    unknown = [name for name in options.programs if name not in PROGRAMS]
+    if unknown:
+        parser.error(f"unknown programs: {', '.join(unknown)}")
+
+    results = run_suite(options.programs, options.repeat)
+    print(format_results(results))
+    if options.save:
+        with open(options.save, "w", encoding="utf-8") as file:
+            json.dump(results, file, indent=2)
+    if options.compare:
+        lines, regressions = compare(load_results(options.compare), results, options.threshold)
+        print()
+        print("\n".join(lines))
+        if regressions:
+            print(f"{len(regressions)} phases slower than {options.threshold}x the baseline")
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
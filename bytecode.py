@@ -0,0 +1,301 @@
+from array import array
+
+from parallel import function_table
+
+LOAD_CONST = 0         # push consts[arg]
+LOAD_NAME = 1          # push the variable names[arg]
+STORE_NAME = 2         # pop a value into the variable names[arg]
+ADD = 3
+SUBTRACT = 4
+MULTIPLY = 5
+DIVIDE = 6
+LESS = 7
+GREATER = 8
+EQUAL = 9
+NOT_EQUAL = 10
+JUMP = 11              # continue from instruction arg
+POP_JUMP_IF_FALSE = 12  # pop a condition and jump to instruction arg if it is falsy
+POP = 13
+BUILD_LIST = 14        # pop arg values into a new list
+LOAD_INDEX = 15        # pop an index and push names[arg][index]
+STORE_INDEX = 16       # pop an index and a value and store names[arg][index] = value
+LENGTH = 17            # push the length of the list names[arg]
+FORMAT = 18            # pop arg values and push their string forms joined together
+LOAD_FUNCTION = 19     # push the function consts[arg][0] after checking it takes consts[arg][1] arguments
+CALL = 20              # pop arg arguments and a function, call it and push its return value
+PRINT = 21             # pop and print arg values, push None
+RETURN_VALUE = 22      # pop the return value and return to the caller
+RETURN_NONE = 23
+DEFINE_FUNCTION = 24   # register the function code consts[arg]
+RAISE = 25             # raise consts[arg][0] with the message consts[arg][1]
+TAIL_CALL = 26         # like CALL, but the function replaces the current frame and returns to its caller
+CALL_METHOD = 27       # pop consts[arg][2] arguments, push the result of list consts[arg][1]'s method consts[arg][0]
+PARALLEL_MAP = 28      # pop a list, push the function consts[arg][0]'s results on its values (see parallel.parmap)
+
+OPNAMES = (
+    "LOAD_CONST", "LOAD_NAME", "STORE_NAME",
+    "ADD", "SUBTRACT", "MULTIPLY", "DIVIDE", "LESS", "GREATER", "EQUAL", "NOT_EQUAL",
+    "JUMP", "POP_JUMP_IF_FALSE", "POP", "BUILD_LIST", "LOAD_INDEX", "STORE_INDEX", "LENGTH", "FORMAT",
+    "LOAD_FUNCTION", "CALL", "PRINT", "RETURN_VALUE", "RETURN_NONE", "DEFINE_FUNCTION", "RAISE", "TAIL_CALL",
+    "CALL_METHOD", "PARALLEL_MAP",
+)
+
+BINARY_OPERATORS = {
+    "+": ADD,
+    "-": SUBTRACT,
+    "*": MULTIPLY,
+    "/": DIVIDE,
+    "<": LESS,
+    ">": GREATER,
+    "==": EQUAL,
+    "!=": NOT_EQUAL,
+}
+
+
+class CodeObject:
+    """Linear bytecode of a module or function: opcodes and their operands in parallel arrays."""
+    def __init__(self, name, params=()):
+        self.name = name
+        self.params = list(params)
+        self.ops = array("B")
+        self.args = array("i")
+        self.consts = []
+        self.names = []
+        self.const_indexes = {}  # {(type, constant): index in consts} of the hashable constants
+        self.name_indexes = {}  # {name: index in names}
+
+    def emit(self, op, arg=0):
+        self.ops.append(op)
+        self.args.append(arg)
+        return len(self.ops) - 1
+
+    def patch(self, position, arg):
+        self.args[position] = arg
+
+    def const_index(self, value):
+        # The type is part of the key because 1, 1.0 and true compare equal
+        key = (type(value), value)
+        try:
+            index = self.const_indexes.get(key)
+        except TypeError:  # Unhashable constants, such as parmap's function tables, are never shared
+            self.consts.append(value)
+            return len(self.consts) - 1
+        if index is None:
+            index = self.const_indexes[key] = len(self.consts)
+            self.consts.append(value)
+        return index
+
+    def name_index(self, name):
+        index = self.name_indexes.get(name)
+        if index is None:
+            index = self.name_indexes[name] = len(self.names)
+            self.names.append(name)
+        return index
+
+    def __repr__(self):
+        return f"<code {self.name}>"
+
+
+class BytecodeCompiler:
+    """Compiles a TokenParser AST into CodeObjects for the VirtualMachine."""
+    STATEMENT_NODES = {
+        "VAR_DECLARATION", "ASSIGNMENT", "INDEX_ASSIGNMENT", "IF", "WHILE",
+        "RETURN", "BREAK", "CONTINUE", "FUNCTION_DEF",
+    }
+
+    def __init__(self):
+        self.code = None
+        self.loops = []  # (continue target, break jump positions) of the enclosing loops
+        self.program = []  # The module AST, where parmap finds the functions to send to workers
+
+    def compile(self, ast, name="<module>", params=()):
+        if self.code is None:
+            self.program = ast
+        outer_code, outer_loops = self.code, self.loops
+        self.code, self.loops = CodeObject(name, params), []
+        for node in ast:
+            self.compile_statement(node)
+        self.code.emit(RETURN_NONE)
+        code = self.code
+        self.code, self.loops = outer_code, outer_loops
+        return code
+
+    def compile_block(self, nodes):
+        for node in nodes:
+            self.compile_statement(node)
+
+    def compile_statement(self, node):
+        node_type = node[0]
+        code = self.code
+
+        if node_type not in self.STATEMENT_NODES:
+            # Expression statement: evaluate and discard the value
+            self.compile_expression(node)
+            code.emit(POP)
+
+        elif node_type in ("VAR_DECLARATION", "ASSIGNMENT"):
+            self.compile_expression(node[-1])
+            code.emit(STORE_NAME, code.name_index(node[-2]))
+
+        elif node_type == "INDEX_ASSIGNMENT":
+            _, list_name, index, value = node
+            self.compile_expression(value)
+            self.compile_expression(index)
+            code.emit(STORE_INDEX, code.name_index(list_name))
+
+        elif node_type == "IF":
+            _, condition, true_block, false_block = node
+            self.compile_expression(condition)
+            jump_to_else = code.emit(POP_JUMP_IF_FALSE)
+            self.compile_block(true_block)
+            if false_block:
+                jump_to_end = code.emit(JUMP)
+                code.patch(jump_to_else, len(code.ops))
+                self.compile_block(false_block)
+                code.patch(jump_to_end, len(code.ops))
+            else:
+                code.patch(jump_to_else, len(code.ops))
+
+        elif node_type == "WHILE":
+            _, condition, body = node
+            loop_start = len(code.ops)
+            self.compile_expression(condition)
+            jump_to_end = code.emit(POP_JUMP_IF_FALSE)
+            self.loops.append((loop_start, []))
+            self.compile_block(body)
+            _, break_jumps = self.loops.pop()
+            code.emit(JUMP, loop_start)
+            for position in [jump_to_end] + break_jumps:
+                code.patch(position, len(code.ops))
+
+        elif node_type == "RETURN":
+            value = node[1]
+            if value and value[0] == "FUNCTION_CALL" and value[1] not in ("print", "parmap"):
+                # Returning a call's result directly lets the call reuse this frame
+                self.compile_call(value[1], value[2], TAIL_CALL)
+            elif value:
+                self.compile_expression(value)
+                code.emit(RETURN_VALUE)
+            else:
+                code.emit(RETURN_NONE)
+
+        elif node_type == "BREAK":
+            if not self.loops:
+                raise SyntaxError("BREAK statement must be inside a loop")
+            self.loops[-1][1].append(code.emit(JUMP))
+
+        elif node_type == "CONTINUE":
+            if not self.loops:
+                raise SyntaxError("CONTINUE statement must be inside a loop")
+            code.emit(JUMP, self.loops[-1][0])
+
+        elif node_type == "FUNCTION_DEF":
+            _, name, params, body, _ = node
+            function_code = self.compile(body, name, [param[1] for param in params])
+            code.emit(DEFINE_FUNCTION, code.const_index(function_code))
+
+    def compile_expression(self, node):
+        node_type = node[0]
+        code = self.code
+
+        if node_type == "NUMBER":
+            value = float(node[1]) if "." in node[1] else int(node[1])
+            code.emit(LOAD_CONST, code.const_index(value))
+
+        elif node_type == "BOOLEAN":
+            code.emit(LOAD_CONST, code.const_index(node[1] == "true"))
+
+        elif node_type == "STRING":
+            code.emit(LOAD_CONST, code.const_index(node[1]))
+
+        elif node_type == "IDENTIFIER":
+            code.emit(LOAD_NAME, code.name_index(node[1]))
+
+        elif node_type == "BIN_OP":
+            _, operator, left, right = node
+            self.compile_expression(left)
+            self.compile_expression(right)
+            if operator in BINARY_OPERATORS:
+                code.emit(BINARY_OPERATORS[operator])
+            else:
+                self.emit_raise(ValueError, f"Unknown operator: {operator}")
+
+        elif node_type == "LIST_LITERAL":
+            for element in node[1]:
+                self.compile_expression(element)
+            code.emit(BUILD_LIST, len(node[1]))
+
+        elif node_type == "LIST_INDEX":
+            _, list_name, index = node
+            self.compile_expression(index)
+            code.emit(LOAD_INDEX, code.name_index(list_name))
+
+        elif node_type == "METHOD_CALL":
+            _, method, object_name, args = node
+            if method == "length" and not args:
+                code.emit(LENGTH, code.name_index(object_name))
+            else:
+                for arg in args:
+                    self.compile_expression(arg)
+                code.emit(CALL_METHOD, code.const_index((method, object_name, len(args))))
+
+        elif node_type == "INTERPOLATED_STRING":
+            for part in node[1]:
+                if isinstance(part, tuple):
+                    self.compile_expression(part)
+                else:
+                    code.emit(LOAD_CONST, code.const_index(part))
+            code.emit(FORMAT, len(node[1]))
+
+        elif node_type == "FUNCTION_CALL":
+            _, name, args = node
+            if name == "print":
+                for arg in args:
+                    self.compile_expression(arg)
+                code.emit(PRINT, len(args))
+            elif name == "parmap":
+                if len(args) != 2 or args[0][0] != "IDENTIFIER":
+                    self.emit_raise(TypeError, "parmap expects a function name and a list")
+                else:
+                    self.compile_expression(args[1])
+                    function_name = args[0][1]
+                    functions = function_table(self.program, function_name)
+                    code.emit(PARALLEL_MAP, code.const_index((function_name, functions)))
+            else:
+                self.compile_call(name, args, CALL)
+
+        else:
+            self.emit_raise(ValueError, f"Unknown node type: {node_type}")
+
+    def compile_call(self, name, args, call_op):
+        code = self.code
+        code.emit(LOAD_FUNCTION, code.const_index((name, len(args))))
+        for arg in args:
+            self.compile_expression(arg)
+        code.emit(call_op, len(args))
+
+    def emit_raise(self, exception_class, message):
+        self.code.emit(RAISE, self.code.const_index((exception_class, message)))
+
+
+def disassemble(code, indent=""):
+    """Returns a readable listing of a CodeObject and the functions defined in it."""
+    lines = [f"{indent}Disassembly of {code.name}({', '.join(code.params)}):"]
+    functions = []
+    for position, (op, arg) in enumerate(zip(code.ops, code.args)):
+        opname = OPNAMES[op]
+        if op in (LOAD_CONST, LOAD_FUNCTION, DEFINE_FUNCTION, RAISE, CALL_METHOD, PARALLEL_MAP):
+            detail = f"{arg} ({code.consts[arg]!r})"
+            if op == DEFINE_FUNCTION:
+                functions.append(code.consts[arg])
+        elif op in (LOAD_NAME, STORE_NAME, LOAD_INDEX, STORE_INDEX, LENGTH):
+            detail = f"{arg} ({code.names[arg]})"
+        elif op in (JUMP, POP_JUMP_IF_FALSE, BUILD_LIST, FORMAT, CALL, TAIL_CALL, PRINT):
+            detail = str(arg)
+        else:
+            detail = ""
+        lines.append(f"{indent}{position:6} {opname:18} {detail}".rstrip())
+    for function in functions:
+        lines.append("")
+        lines.append(disassemble(function, indent))
+    return "\n".join(lines)
@@ -0,0 +1,72 @@
+import sys
+
+from closure_compiler import ClosureEvaluator
+from evaluator import Evaluator
+from inliner import FunctionInliner
+from lexer import Lexer
+from optimizer import Optimizer
+from output_sinks import MemorySink, write_line
+from sample_programs import PROGRAMS
+from token_parser import TokenParser
+from transpiler import PythonTranspiler
+from type_checker import TypeChecker
+from virtual_machine import VirtualMachine
+
+# Every engine prints through the given output, so a mismatch also catches an engine that ignores it
+ENGINES = {
+    "evaluator": lambda ast, output: Evaluator(output=output).evaluate(ast),
+    "closure": lambda ast, output: ClosureEvaluator(output).evaluate(ast),
+    "vm": lambda ast, output: VirtualMachine(output).evaluate(ast),
+    "optimized": lambda ast, output: Evaluator(output=output).evaluate(Optimizer().optimize(ast)),
+}
+# Engines that only accept ASTs that passed TypeChecker.check
+TYPED_ENGINES = {
+    "python": lambda ast, output: PythonTranspiler().evaluate(ast, output),
+    "inlined": lambda ast, output: Evaluator(output=output).evaluate(inline_functions(ast)),
+}
+
+
+def inline_functions(ast):
+    type_checker = TypeChecker()
+    type_checker.check(ast)
+    return FunctionInliner(type_checker.function_signatures).inline(ast)
+
+
+def run_engine(engine, ast, error_messages=True):
+    """Runs the AST with one engine and returns its output, including the error it stopped with."""
+    output = MemorySink()
+    try:
+        engine(ast, output)
+    except Exception as ex:
+        write_line(output, [f"{type(ex).__name__}: {ex}" if error_messages else type(ex).__name__])
+    return output.getvalue()
+
+
+def check_program(name, source):
+    ast = TokenParser(Lexer(source).tokenize()).parse()
+
+    try:
+        TypeChecker().check(ast)
+        typed_engines = TYPED_ENGINES
+    except TypeError:
+        typed_engines = {}
+
+    failures = []
+    # Transpiled code raises Python's own error messages, so only the error types are compared for it
+    for engines, error_messages in ((ENGINES, True), (typed_engines, False)):
+        expected = run_engine(ENGINES["evaluator"], ast, error_messages)
+        for engine_name, engine in engines.items():
+            output = run_engine(engine, ast, error_messages)
+            if output != expected:
+                failures.append(f"{name}: {engine_name} printed {output!r}, expected {expected!r}")
+    return failures
+
+
+if __name__ == "__main__":
+    failures = []
+    for name, source in PROGRAMS.items():
+        failures.extend(check_program(name, source))
+    for failure in failures:
+        print(failure)
+    print(f"{len(PROGRAMS)} programs, {len(ENGINES) + len(TYPED_ENGINES)} engines, {len(failures)} mismatches")
+    sys.exit(1 if failures else 0)
@@ -0,0 +1,288 @@
+from control_flow import BREAK, CONTINUE, RETURN
+from list_builtins import BUILTIN_FUNCTIONS, list_method
+from output_sinks import write_line
+from parallel import function_table, parmap
+
+
+class ClosureEvaluator:
+    """Runs programs by compiling every AST node once into a Python closure.
+
+    Behaves like Evaluator, but node dispatch, operator lookup and function table lookup happen
+    at compile time instead of every time a node is executed. Blocks signal break, continue and
+    return by returning a ControlSignal instead of raising exceptions. print writes to output like
+    it does in Evaluator.
+    """
+    CONTROL_NODES = {"IF", "WHILE", "RETURN", "BREAK", "CONTINUE"}
+
+    def __init__(self, output=None):
+        self.functions = {}  # Function cells: {name: [(param names, compiled body) or None]}
+        self.return_value = None
+        self.output = output
+        self.program = []  # The AST being compiled, where parmap finds the functions to send to workers
+        self.compilers = {
+            "NUMBER": self.compile_number,
+            "BOOLEAN": self.compile_boolean,
+            "STRING": self.compile_string,
+            "INTERPOLATED_STRING": self.compile_interpolated_string,
+            "IF": self.compile_if,
+            "WHILE": self.compile_while,
+            "RETURN": self.compile_return,
+            "CONTINUE": self.compile_continue,
+            "BREAK": self.compile_break,
+            "LIST_LITERAL": self.compile_list_literal,
+            "LIST_INDEX": self.compile_list_index,
+            "INDEX_ASSIGNMENT": self.compile_index_assignment,
+            "METHOD_CALL": self.compile_method_call,
+            "IDENTIFIER": self.compile_identifier,
+            "VAR_DECLARATION": self.compile_assignment,
+            "ASSIGNMENT": self.compile_assignment,
+            "BIN_OP": self.compile_bin_op,
+            "FUNCTION_DEF": self.compile_function_def,
+            "FUNCTION_CALL": self.compile_function_call,
+        }
+
+    def evaluate(self, ast):
+        self.compile(ast)({})
+
+    def compile(self, ast):
+        self.program = ast
+        return self.compile_block(ast)
+
+    def compile_block(self, nodes):
+        steps = [(self.compile_node(node), node[0] in self.CONTROL_NODES) for node in nodes]
+
+        def run_block(context):
+            for step, is_control in steps:
+                if is_control:
+                    signal = step(context)
+                    if signal is not None:
+                        return signal
+                else:
+                    step(context)
+            return None
+        return run_block
+
+    def compile_node(self, node):
+        node_type = node[0]
+        compiler = self.compilers.get(node_type)
+        if compiler is None:
+            def unknown_node(context):
+                raise ValueError(f"Unknown node type: {node_type}")
+            return unknown_node
+        return compiler(node)
+
+    def compile_number(self, node):
+        value = float(node[1]) if "." in node[1] else int(node[1])
+        return lambda context: value
+
+    def compile_boolean(self, node):
+        value = node[1] == "true"
+        return lambda context: value
+
+    def compile_string(self, node):
+        value = node[1]
+        return lambda context: value
+
+    def compile_interpolated_string(self, node):
+        parts = [self.compile_node(part) if isinstance(part, tuple) else part for part in node[1]]
+
+        def interpolate(context):
+            return "".join([part if part.__class__ is str else str(part(context)) for part in parts])
+        return interpolate
+
+    def compile_if(self, node):
+        _, condition, true_block, false_block = node
+        condition = self.compile_node(condition)
+        true_block = self.compile_block(true_block)
+        false_block = self.compile_block(false_block) if false_block else None
+
+        def run_if(context):
+            if condition(context):
+                return true_block(context)
+            elif false_block:
+                return false_block(context)
+            return None
+        return run_if
+
+    def compile_while(self, node):
+        _, condition, body = node
+        condition = self.compile_node(condition)
+        body = self.compile_block(body)
+
+        def run_while(context):
+            while condition(context):
+                signal = body(context)
+                if signal is BREAK:
+                    break
+                elif signal is RETURN:
+                    return RETURN
+            return None
+        return run_while
+
+    def compile_return(self, node):
+        return_value = self.compile_node(node[1]) if node[1] else None
+
+        def run_return(context):
+            self.return_value = return_value(context) if return_value else None
+            return RETURN
+        return run_return
+
+    def compile_continue(self, node):
+        return lambda context: CONTINUE
+
+    def compile_break(self, node):
+        return lambda context: BREAK
+
+    def compile_list_literal(self, node):
+        elements = [self.compile_node(element) for element in node[1]]
+        return lambda context: [element(context) for element in elements]
+
+    def compile_list_index(self, node):
+        _, list_name, index = node
+        index = self.compile_node(index)
+        return lambda context: context[list_name][index(context)]
+
+    def compile_index_assignment(self, node):
+        _, list_name, index, value = node
+        index = self.compile_node(index)
+        value = self.compile_node(value)
+
+        def assign_index(context):
+            context[list_name][index(context)] = value(context)
+        return assign_index
+
+    def compile_method_call(self, node):
+        _, method, object_name, args = node
+        if method == "length" and not args:
+            return lambda context: len(context[object_name])
+        args = [self.compile_node(arg) for arg in args]
+        try:
+            function = list_method(method, len(args))
+        except (NameError, TypeError):
+            # Like the other engines, an unknown method or wrong argument count only fails when it runs
+            def call_invalid_method(context):
+                list_method(method, len(args))
+            return call_invalid_method
+
+        def call_method(context):
+            return function(context[object_name], *[arg(context) for arg in args])
+        return call_method
+
+    def compile_identifier(self, node):
+        identifier_name = node[1]
+
+        def load(context):
+            try:
+                return context[identifier_name]
+            except KeyError:
+                raise NameError(f"Undefined variable '{identifier_name}'") from None
+        return load
+
+    def compile_assignment(self, node):
+        variable_name = node[-2]
+        value = self.compile_node(node[-1])
+
+        def assign(context):
+            variable_value = context[variable_name] = value(context)
+            return variable_value
+        return assign
+
+    def compile_bin_op(self, node):
+        _, operator_symbol, left, right = node
+        left = self.compile_node(left)
+        right = self.compile_node(right)
+
+        if operator_symbol == "+":
+            return lambda context: left(context) + right(context)
+        elif operator_symbol == "-":
+            return lambda context: left(context) - right(context)
+        elif operator_symbol == "*":
+            return lambda context: left(context) * right(context)
+        elif operator_symbol == "<":
+            return lambda context: left(context) < right(context)
+        elif operator_symbol == ">":
+            return lambda context: left(context) > right(context)
+        elif operator_symbol == "==":
+            return lambda context: left(context) == right(context)
+        elif operator_symbol == "!=":
+            return lambda context: left(context) != right(context)
+        elif operator_symbol == "/":
+            return lambda context: left(context) / right(context)
+
+        def unknown_operator(context):
+            left(context)
+            right(context)
+            raise ValueError(f"Unknown operator: {operator_symbol}")
+        return unknown_operator
+
+    def compile_function_def(self, node):
+        _, name, params, body, _ = node
+        cell = self.function_cell(name)
+        function = ([param[1] for param in params], self.compile_block(body))
+
+        def define(context):
+            cell[0] = function
+        return define
+
+    def compile_function_call(self, node):
+        _, name, args = node
+        if name == "parmap":
+            return self.compile_parmap(args)
+        args = [self.compile_node(arg) for arg in args]
+
+        # Handle built-in print function
+        if name == "print":
+            output = self.output
+
+            def call_print(context):
+                write_line(output, [arg(context) for arg in args])
+            return call_print
+
+        cell = self.function_cell(name)
+
+        def call(context):
+            function = cell[0]
+            if function is None:
+                if name in BUILTIN_FUNCTIONS:
+                    return BUILTIN_FUNCTIONS[name](*[arg(context) for arg in args])
+                raise NameError(f"Undefined function '{name}'")
+
+            param_names, body = function
+            if len(param_names) != len(args):
+                raise TypeError(f"Function '{name}' expects {len(param_names)} arguments, got {len(args)}")
+
+            function_context = dict(zip(param_names, [arg(context) for arg in args]))
+            if body(function_context) is RETURN:
+                return self.return_value
+            return None
+        return call
+
+    def compile_parmap(self, args):
+        if len(args) != 2 or args[0][0] != "IDENTIFIER":
+            # Like a bad operator, a malformed call only fails when it runs
+            def invalid_parmap(context):
+                raise TypeError("parmap expects a function name and a list")
+            return invalid_parmap
+        name = args[0][1]
+        values = self.compile_node(args[1])
+        cell = self.function_cell(name)
+        functions = function_table(self.program, name)
+
+        def call_one(value):
+            param_names, body = cell[0]
+            if body({param_names[0]: value}) is RETURN:
+                return self.return_value
+            return None
+
+        def call_parmap(context):
+            items = values(context)
+            if cell[0] is None:
+                raise NameError(f"Undefined function '{name}'")
+            return parmap(name, items, functions, call_one)
+        return call_parmap
+
+    def function_cell(self, name):
+        cell = self.functions.get(name)
+        if cell is None:
+            cell = self.functions[name] = [None]
+        return cell
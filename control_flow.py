@@ -0,0 +1,14 @@
+class ControlSignal:
+    """Returned by a block of statements that stopped early because of break, continue or return"""
+    __slots__ = ("name",)
+
+    def __init__(self, name):
+        self.name = name
+
+    def __repr__(self):
+        return self.name
+
+
+BREAK = ControlSignal("BREAK")
+CONTINUE = ControlSignal("CONTINUE")
+RETURN = ControlSignal("RETURN")
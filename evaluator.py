@@ -1,20 +1,73 @@
-from exceptions import BreakException, ContinueException, ReturnException
+from control_flow import BREAK, CONTINUE, RETURN
+from list_builtins import BUILTIN_FUNCTIONS, list_method
+from memoization import MISSING, MemoCache, find_pure_functions
+from output_sinks import write_line
+from parallel import parmap
+from resolver import UNSET, Resolver
+from typed_lists import typed_list
 
 
 class Evaluator:
-    def __init__(self):
-        self.functions = {}  # Function table: {name: (params, body)}
-
-    def evaluate(self, ast):
-        context = {}
-        for node in ast:
-            self.eval_node(node, context)
-
-    def eval_nodes(self, ast, context):
+    """Runs programs by walking the AST.
+
+    evaluate() first resolves every variable to a slot, so each function call runs with a list
+    of slots as its frame instead of a dict keyed by variable name.
+
+    With memoize on, the results of pure functions are cached per function in an LRU cache of
+    memo_size entries. always_memoize and never_memoize force memoization of the named
+    functions on or off whatever the purity analysis finds; forced functions still need int,
+    str or bool arguments. memo_stats() returns the hit and miss counts of each cache.
+
+    print writes to output, an OutputSink or any object with a write(text) method, or to the
+    current sys.stdout when it is None.
+    """
+    # Statements that can stop a block early by returning a ControlSignal
+    CONTROL_NODES = {"IF", "WHILE", "RETURN", "BREAK", "CONTINUE"}
+
+    def __init__(self, memoize=True, memo_size=1024, always_memoize=(), never_memoize=(), output=None):
+        self.functions = {}  # Function table: {name: (params, body, frame size)}
+        self.return_value = None  # Value of the last executed return
+        self.memoize = memoize
+        self.memo_size = memo_size
+        self.always_memoize = set(always_memoize)
+        self.never_memoize = set(never_memoize)
+        self.memo_caches = {}  # {function name: MemoCache}
+        self.output = output
+
+    def evaluate(self, ast, variables=None):
+        """Runs the AST. variables maps names to the values of global variables defined before it starts."""
+        variables = variables or {}
+        self.memoize_functions(find_pure_functions(ast) if self.memoize else set())
+        ast, frame_size = self.resolve(ast, list(variables))
+        self.eval_nodes(ast, list(variables.values()) + [UNSET] * (frame_size - len(variables)))
+
+    def memoize_functions(self, pure_functions):
+        """Starts a new, empty cache for every memoized function of the program about to run.
+
+        Caches are keyed by function name, so a cache kept from an earlier evaluate() could answer
+        calls to a different function that the next program defines under the same name.
+        """
+        self.memo_caches = {
+            name: MemoCache(self.memo_size)
+            for name in (set(pure_functions) | self.always_memoize) - self.never_memoize
+        }
+
+    def resolve(self, ast, variables=()):
+        return Resolver().resolve(ast, variables)
+
+    def eval_nodes(self, ast, frame):
+        """Evaluates a block and returns the ControlSignal that stopped it early, or None."""
+        control_nodes = self.CONTROL_NODES
         for node in ast:
-            self.eval_node(node, context)
+            if node[0] in control_nodes:
+                signal = self.eval_node(node, frame)
+                if signal is not None:
+                    return signal
+            else:
+                self.eval_node(node, frame)
+        return None
 
-    def eval_node(self, node, context):
+    def eval_node(self, node, frame):
         node_type = node[0]
 
         if node_type == "NUMBER":
@@ -25,73 +78,74 @@ class Evaluator:
 
         elif node_type == "IF":
             _, condition, true_block, false_block = node
-            condition_result = self.eval_node(condition, context)
+            condition_result = self.eval_node(condition, frame)
 
             if condition_result:
-                return self.eval_nodes(true_block, context)
+                return self.eval_nodes(true_block, frame)
             elif false_block:
-                return self.eval_nodes(false_block, context)
+                return self.eval_nodes(false_block, frame)
             return None
 
         elif node_type == "WHILE":
             _, condition, body = node
 
-            while self.eval_node(condition, context):
-                try:
-                    self.eval_nodes(body, context)
-                except BreakException:
+            while self.eval_node(condition, frame):
+                signal = self.eval_nodes(body, frame)
+                if signal is BREAK:
                     break
-                except ContinueException:
-                    continue
-
+                elif signal is RETURN:
+                    return RETURN
 
         elif node_type == "RETURN":
             _, return_value = node
-            raise ReturnException(self.eval_node(return_value, context) if return_value else None)
+            self.return_value = self.eval_node(return_value, frame) if return_value else None
+            return RETURN
 
         elif node_type == "CONTINUE":
-            raise ContinueException()
+            return CONTINUE
 
         elif node_type == "BREAK":
-            raise BreakException()
+            return BREAK
 
         elif node_type == "LIST_LITERAL":
             _, elements = node
-            return [self.eval_node(element, context) for element in elements]
+            return [self.eval_node(element, frame) for element in elements]
 
         elif node_type == "LIST_INDEX":
-            _, list_name, index = node
-            return context[list_name][self.eval_node(index, context)]
+            _, list_name, index, slot = node
+            return frame[slot][self.eval_node(index, frame)]
 
         elif node_type == "INDEX_ASSIGNMENT":
-            _, list_name, index, value = node
-            context[list_name][self.eval_node(index, context)] = self.eval_node(value, context)
+            _, list_name, index, value, slot = node
+            frame[slot][self.eval_node(index, frame)] = self.eval_node(value, frame)
             return None
 
         elif node_type == "METHOD_CALL":
-            _, method, object_name, value = node
-            if method == "length":
-                return len(context[object_name])
-            raise NameError(f"Undefined method '{method}'")
+            _, method, object_name, args, slot = node
+            if method == "length" and not args:
+                return len(frame[slot])
+            function = list_method(method, len(args))
+            return function(frame[slot], *[self.eval_node(arg, frame) for arg in args])
 
         elif node_type == "IDENTIFIER":
-            # Resolve variable name in the context
-            identifier_name = node[1]
-            if identifier_name in context:
-                return context[identifier_name]
-            else:
-                raise NameError(f"Undefined variable '{identifier_name}'")
+            value = frame[node[2]]
+            # The Resolver only knows the variable was declared earlier, not that the declaration ran
+            if value is UNSET:
+                raise NameError(f"Undefined variable '{node[1]}'")
+            return value
 
         elif node_type == "VAR_DECLARATION":
-            variable_name = node[2]
-            variable_value = self.eval_node(node[3], context)
-            context[variable_name] = variable_value
+            variable_value = self.eval_node(node[3], frame)
+            if node[3][0] == "LIST_LITERAL":
+                # A new list has no other references yet, so it can move to compact storage
+                variable_value = typed_list(node[1], variable_value)
+            frame[node[4]] = variable_value
             return variable_value
 
         elif node_type == "BIN_OP":
             _, operator, left_node, right_node = node
-            left_value = self.eval_node(left_node, context)
-            right_value = self.eval_node(right_node, context)
+            left_value = self.eval_node(left_node, frame)
+            right_value = self.eval_node(right_node, frame)
 
             if operator == "+":
                 return left_value + right_value
@@ -113,60 +167,83 @@ class Evaluator:
                 raise ValueError(f"Unknown operator: {operator}")
 
         elif node_type == "FUNCTION_DEF":
-            _, name, params, body, _ = node
-            self.functions[name] = (params, body)
+            _, name, params, body, _, frame_size = node
+            self.functions[name] = (params, body, frame_size)
 
         elif node_type == "ASSIGNMENT":
-            var_name = node[1]
-            value = self.eval_node(node[2], context)
-            context[var_name] = value
+            value = self.eval_node(node[2], frame)
+            frame[node[3]] = value
             return value
 
         elif node_type == "STRING":
             return node[1]
 
         elif node_type == "INTERPOLATED_STRING":
-            parts = node[1]
-            result = ""
-            for part in parts:
-                if isinstance(part, tuple):
-                    # Evaluate embedded expression
-                    result += str(self.eval_node(part, context))
-                else:
-                    # Append literal part
-                    result += part
-            return result
+            # Literal parts are str, placeholders are expression nodes
+            pieces = []
+            for part in node[1]:
+                pieces.append(part if part.__class__ is str else str(self.eval_node(part, frame)))
+            return "".join(pieces)
 
         elif node_type == "FUNCTION_CALL":
             _, name, args = node
 
             # Handle built-in print function
             if name == "print":
-                evaluated_args = [self.eval_node(arg, context) for arg in args]
-                print(*evaluated_args)
+                write_line(self.output, [self.eval_node(arg, frame) for arg in args])
                 return None
 
+            if name == "parmap":
+                return self.parallel_map(args, frame)
+
             # Lookup the function definition
             if name not in self.functions:
+                if name in BUILTIN_FUNCTIONS:
+                    return BUILTIN_FUNCTIONS[name](*[self.eval_node(arg, frame) for arg in args])
                 raise NameError(f"Undefined function '{name}'")
 
-            params, body = self.functions[name]
+            params, body, frame_size = self.functions[name]
 
             # Check arity (number of arguments)
             if len(params) != len(args):
                 raise TypeError(f"Function '{name}' expects {len(params)} arguments, got {len(args)}")
 
             # Evaluate arguments
-            arg_values = [self.eval_node(arg, context) for arg in args]
-
-            # Create a new context for the function execution
-            function_context = {param[1]: value for param, value in zip(params, arg_values)}
-
-            # Evaluate the function body in its own context
-            try:
-                return self.eval_nodes(body, function_context)
-            except ReturnException as ex:
-                return ex.value
+            arg_values = [self.eval_node(arg, frame) for arg in args]
+
+            cache = self.memo_caches.get(name)
+            if cache is not None:
+                # The types are part of the key because 1, 1.0 and true compare equal
+                key = (*arg_values, *map(type, arg_values))
+                result = cache.lookup(key)
+                if result is MISSING:
+                    result = self.call_function(name, body, frame_size, arg_values)
+                    cache.store(key, result)
+                return result
+            return self.call_function(name, body, frame_size, arg_values)
 
         else:
             raise ValueError(f"Unknown node type: {node_type}")
+
+    def call_function(self, name, body, frame_size, arg_values):
+        # Parameters take the first slots of the function's frame
+        function_frame = arg_values + [UNSET] * (frame_size - len(arg_values))
+
+        # Evaluate the function body in its own frame
+        if self.eval_nodes(body, function_frame) is RETURN:
+            return self.return_value
+        return None
+
+    def parallel_map(self, args, frame):
+        if len(args) != 2 or args[0][0] != "IDENTIFIER":
+            raise TypeError("parmap expects a function name and a list")
+        name = args[0][1]
+        values = self.eval_node(args[1], frame)
+        if name not in self.functions:
+            raise NameError(f"Undefined function '{name}'")
+        _, body, frame_size = self.functions[name]
+        return parmap(name, values, self.functions,
+                      lambda value: self.call_function(name, body, frame_size, [value]))
+
+    def memo_stats(self):
+        return {name: cache.stats() for name, cache in self.memo_caches.items()}
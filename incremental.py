@@ -0,0 +1,230 @@
+from bisect import bisect_left, bisect_right
+from itertools import islice
+
+from lexer import SinglePassLexer
+from token_parser import StreamingTokenParser
+
+
+class IncrementalDocument:
+    """Keeps the tokens and AST of a source up to date while it is being edited.
+
+    An edit re-lexes lines starting from the lexer state saved at the start of the first edited line
+    and stops as soon as the state at a line boundary matches the saved one again. Only the top-level
+    statements around the edit are re-parsed; the rest of the AST is reused.
+    Lines are numbered from 1 and columns from 0, like in LanguageToken.
+
+    When an edit adds or removes lines, the tokens after it are renumbered lazily: the tokens on lines
+    from shift_line on, and the closing DEDENTs, carry line numbers that are shift too small, and
+    shift_statement is the first statement starting there. Parsing corrects the lines it reaches, so
+    the cost of an edit does not grow with the length of the source after it.
+    """
+    def __init__(self, source, lexer_class=SinglePassLexer):
+        self.lexer_class = lexer_class
+        # Unlike splitlines, split keeps the empty line after a final newline, so source round-trips
+        self.lines = source.replace("\r\n", "\n").split("\n")
+        self.rebuild()
+
+    @property
+    def source(self):
+        return "\n".join(self.lines)
+
+    @property
+    def tokens(self):
+        self.move_shift_line(len(self.line_tokens) + 1)
+        tokens = [token for line_tokens in self.line_tokens for token in line_tokens]
+        tokens.extend(self.end_tokens)
+        return tokens
+
+    @property
+    def ast(self):
+        """The top-level statement nodes. Later edits update this list in place."""
+        return self.nodes
+
+    def rebuild(self):
+        """Lexes and parses the whole document from scratch."""
+        self.valid = False
+        lexer = self.lexer_class()
+        self.line_states = []
+        self.line_tokens = []
+        last = len(self.lines) - 1
+        for index, text_line in enumerate(self.lines):
+            self.line_states.append(self.lexer_state(lexer))
+            self.line_tokens.append(self.tokenize_line(lexer, text_line, index == last))
+        self.end_tokens = lexer.close_indentation()
+        self.starts = []  # The first token of every top-level statement
+        self.nodes = []
+        self.shift = self.shift_statement = 0
+        self.shift_line = len(self.lines) + 1
+        self.starts, self.nodes, _ = self.parse_statements(self.tokens_from(0, 0), 0)
+        self.shift_statement = len(self.starts)
+        self.valid = True
+
+    def edit(self, start_line, start_column, end_line, end_column, text):
+        """Replaces the text between the two positions and updates the tokens and AST."""
+        first, last = start_line - 1, end_line - 1
+        replaced = self.lines[first][:start_column] + text + self.lines[last][end_column:]
+        new_lines = replaced.replace("\r\n", "\n").split("\n")
+        if first > 0 and last == len(self.lines) - 1 and new_lines == [""]:
+            # The empty last line is not lexed, so the closing DEDENTs take their position from the line before
+            first -= 1
+            new_lines.insert(0, self.lines[first])
+
+        if not self.valid:
+            self.lines[first:last + 1] = new_lines
+            self.rebuild()
+            return self.ast
+
+        try:
+            relexed_lines, new_states, new_tokens, old_end, end_tokens = self.relex(first, last + 1, new_lines)
+        except SyntaxError:
+            self.lines[first:last + 1] = new_lines
+            self.valid = False
+            raise
+
+        # Statements starting after the re-lexed lines keep their tokens and can be reused
+        statement_indexes = range(len(self.starts))
+        resume_index = bisect_right(statement_indexes, old_end, key=self.statement_line)
+        # Start from the last statement before the edit, which may continue into the edited lines
+        reparse_index = max(bisect_left(statement_indexes, first + 1, key=self.statement_line) - 1, 0)
+
+        # The kept lines move by the change in line count, which is added to the lazy shift
+        self.move_shift_line(old_end)
+        line_delta = len(relexed_lines) - (old_end - first)
+        self.lines[first:old_end] = relexed_lines
+        self.line_states[first:old_end] = new_states
+        self.line_tokens[first:old_end] = new_tokens
+        self.shift_line += line_delta
+        self.shift += line_delta
+        if end_tokens is not None:
+            for token in end_tokens:
+                token.line -= self.shift
+            self.end_tokens = end_tokens
+
+        try:
+            line_index = token_index = 0
+            if reparse_index > 0:
+                start_token = self.starts[reparse_index]
+                line_index = start_token.line - 1
+                token_index = next(index for index, token in enumerate(self.line_tokens[line_index])
+                                   if token is start_token)
+            starts, nodes, reused_index = self.parse_statements(self.tokens_from(line_index, token_index),
+                                                                resume_index)
+        except SyntaxError:
+            self.valid = False
+            raise
+
+        self.starts[reparse_index:reused_index] = starts
+        self.nodes[reparse_index:reused_index] = nodes
+        self.shift_statement += len(starts) - (reused_index - reparse_index)
+        return self.ast
+
+    def relex(self, first, end, new_lines):
+        """Lexes new_lines in place of lines[first:end] and then old lines until the lexer state converges.
+
+        Returns the re-lexed lines with their states and tokens, the index of the first old line that was kept
+        and, if the re-lexing reached the end of the source, the new closing DEDENT tokens.
+        """
+        lexer = self.lexer_class()
+        lexer.indent_stack, lexer.comment_depth = self.restore_state(self.line_states[first])
+        lexer.line = first
+
+        relexed_lines = list(new_lines)
+        new_states = []
+        new_tokens = []
+        last = len(new_lines) - 1 if end == len(self.lines) else -1
+        for index, text_line in enumerate(new_lines):
+            new_states.append(self.lexer_state(lexer))
+            new_tokens.append(self.tokenize_line(lexer, text_line, index == last))
+
+        while end < len(self.lines) and self.lexer_state(lexer) != self.line_states[end]:
+            relexed_lines.append(self.lines[end])
+            new_states.append(self.lexer_state(lexer))
+            new_tokens.append(self.tokenize_line(lexer, self.lines[end], end == len(self.lines) - 1))
+            end += 1
+
+        end_tokens = lexer.close_indentation() if end == len(self.lines) else None
+        return relexed_lines, new_states, new_tokens, end, end_tokens
+
+    def move_shift_line(self, shift_line):
+        """Makes the tokens on lines before shift_line carry their real line numbers and those after it shifted ones.
+
+        Only the lines between the old and the new shift_line are touched.
+        """
+        if not self.shift:
+            # Every line number is correct, so only the statement where the shifted lines start changes
+            self.shift_line = shift_line
+            self.shift_statement = bisect_left(self.starts, shift_line + 1, key=self.token_line)
+            return
+        starts = self.starts
+        while self.shift_line < shift_line:
+            for token in self.tokens_at(self.shift_line):
+                token.line += self.shift
+                if self.shift_statement < len(starts) and starts[self.shift_statement] is token:
+                    self.shift_statement += 1
+            self.shift_line += 1
+        while self.shift_line > shift_line:
+            self.shift_line -= 1
+            for token in reversed(self.tokens_at(self.shift_line)):
+                token.line -= self.shift
+                if self.shift_statement > 0 and starts[self.shift_statement - 1] is token:
+                    self.shift_statement -= 1
+        if self.shift_line > len(self.line_tokens):
+            self.shift = 0
+
+    def tokens_at(self, line_index):
+        """Returns the tokens of a line, or the closing DEDENTs for the index after the last line."""
+        return self.line_tokens[line_index] if line_index < len(self.line_tokens) else self.end_tokens
+
+    def tokens_from(self, line_index, token_index):
+        """Yields the tokens from the given one on, correcting the line numbers of each line it reaches."""
+        for index in range(line_index, len(self.line_tokens) + 1):
+            if index >= self.shift_line:
+                self.move_shift_line(index + 1)
+            if index == line_index:
+                yield from islice(self.tokens_at(index), token_index, None)
+            else:
+                yield from self.tokens_at(index)
+
+    def parse_statements(self, tokens, reuse_index):
+        """Parses top-level statements until the tokens run out or a statement from reuse_index on starts.
+
+        Returns the start tokens and nodes parsed and the index of the first statement that can be reused.
+        """
+        parser = StreamingTokenParser(tokens)
+        starts = []
+        nodes = []
+        while True:
+            token = parser.current_token()
+            # TokenParser.parse also stops at a DEDENT left over at the top level
+            if token is None or token.type == "DEDENT":
+                return starts, nodes, len(self.starts)
+            while reuse_index < len(self.starts) and self.statement_line(reuse_index) < token.line:
+                reuse_index += 1
+            if starts and reuse_index < len(self.starts) and self.starts[reuse_index] is token:
+                return starts, nodes, reuse_index
+            starts.append(token)
+            nodes.append(parser.statement())
+
+    def statement_line(self, index):
+        line = self.starts[index].line
+        return line + self.shift if index >= self.shift_statement else line
+
+    @staticmethod
+    def tokenize_line(lexer, text_line, is_last):
+        # The lexer splits with str.splitlines, which drops the empty line after a final newline
+        if is_last and not text_line:
+            return []
+        return lexer.tokenize_source_line(text_line)
+
+    @staticmethod
+    def token_line(token):
+        return token.line
+
+    @staticmethod
+    def lexer_state(lexer):
+        return tuple(lexer.indent_stack), lexer.comment_depth
+
+    @staticmethod
+    def restore_state(state):
+        indent_stack, comment_depth = state
+        return list(indent_stack), comment_depth
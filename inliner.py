@@ -0,0 +1,173 @@
+from ast_utils import AstTransformer, count_nodes, walk
+
+TRIVIAL_NODES = {"NUMBER", "STRING", "BOOLEAN", "IDENTIFIER"}
+
+
+class ParameterSubstituter(AstTransformer):
+    """Replaces the parameters of an inlined return expression with the call's arguments."""
+    def __init__(self, arguments):
+        self.arguments = arguments  # {param name: argument expression}
+
+    def visit_expression(self, node):
+        node_type = node[0]
+        if node_type == "IDENTIFIER" and node[1] in self.arguments:
+            return self.arguments[node[1]]
+        # Lists and methods refer to their variable by name, so the argument is known to be an IDENTIFIER
+        elif node_type == "LIST_INDEX" and node[1] in self.arguments:
+            node = node_type, self.arguments[node[1]][1], node[2]
+        elif node_type == "METHOD_CALL" and node[2] in self.arguments:
+            node = node_type, node[1], self.arguments[node[2]][1], node[3]
+        return self.rebuild(node)
+
+
+class FunctionInliner(AstTransformer):
+    """Inlines calls to small non-recursive functions whose body is a single return, then
+    removes top-level functions that can no longer be reached.
+
+    function_signatures comes from a TypeChecker that has checked the AST. Only functions
+    defined once, at the top level, are touched. After inline() the report attribute holds
+    the number of inlined calls per function and the names of the removed functions.
+    """
+    def __init__(self, function_signatures, max_size=10):
+        self.function_signatures = function_signatures
+        self.max_size = max_size
+        self.candidates = set()
+        self.inline_bodies = {}  # {name: (param names, return expression)} of the functions visited so far
+        self.changes = 0
+        self.report = {"inlined": {}, "removed": []}
+
+    def inline(self, ast):
+        self.inline_bodies = {}
+        self.report = {"inlined": {}, "removed": []}
+        definitions = self.top_level_functions(ast)
+        call_graph = {name: self.called_functions(node[3]) for name, node in definitions.items()}
+        self.candidates = {
+            name for name, node in definitions.items()
+            if name in self.function_signatures and self.is_single_return(node)
+            and not self.is_recursive(name, call_graph)
+        }
+        ast = self.transform(ast)
+        return self.remove_unreachable(ast, self.top_level_functions(ast))
+
+    def format_report(self):
+        lines = [f"inlined {name}: {count} call(s)" for name, count in self.report["inlined"].items()]
+        lines.extend(f"removed {name}" for name in self.report["removed"])
+        return "\n".join(lines) or "nothing inlined or removed"
+
+    def visit_statement(self, node):
+        node = self.rebuild(node)
+        # The body was rebuilt first, so calls inside it are already inlined
+        if node[0] == "FUNCTION_DEF" and node[1] in self.candidates:
+            return_value = node[3][0][1]
+            if count_nodes([return_value]) <= self.max_size:
+                self.inline_bodies[node[1]] = ([param[1] for param in node[2]], return_value)
+        return node
+
+    def visit_expression(self, node):
+        node = self.rebuild(node)
+        if node[0] == "FUNCTION_CALL" and node[1] in self.inline_bodies:
+            params, return_value = self.inline_bodies[node[1]]
+            if len(params) == len(node[2]) and self.can_substitute(params, node[2], return_value):
+                self.changes += 1
+                self.report["inlined"][node[1]] = self.report["inlined"].get(node[1], 0) + 1
+                return ParameterSubstituter(dict(zip(params, node[2]))).visit_expression(return_value)
+        return node
+
+    @staticmethod
+    def is_single_return(node):
+        """Checks that a function only returns an expression built from its own parameters."""
+        body = node[3]
+        if len(body) != 1 or body[0][0] != "RETURN" or not body[0][1]:
+            return False
+        params = {param[1] for param in node[2]}
+        for child in walk([body[0][1]]):
+            if child[0] == "IDENTIFIER" and child[1] not in params:
+                return False
+            if ((child[0] == "LIST_INDEX" and child[1] not in params)
+                    or (child[0] == "METHOD_CALL" and child[2] not in params)):
+                return False
+        return True
+
+    @staticmethod
+    def can_substitute(params, args, return_value):
+        """Checks that substituting the arguments keeps the number and order of their evaluations.
+
+        Constants and variables may be copied freely. Any other argument must be used exactly once,
+        in parameter order, and the body must not call anything that could run before it.
+        """
+        uses = []
+        named_uses = set()
+        has_calls = False
+        for node in walk([return_value]):
+            if node[0] == "IDENTIFIER":
+                uses.append(node[1])
+            elif node[0] == "LIST_INDEX":
+                named_uses.add(node[1])
+            elif node[0] == "METHOD_CALL":
+                named_uses.add(node[2])
+                has_calls = True  # Methods such as append change their list
+            elif node[0] == "FUNCTION_CALL":
+                has_calls = True
+
+        if any(param in named_uses and arg[0] != "IDENTIFIER" for param, arg in zip(params, args)):
+            return False
+        complex_params = [param for param, arg in zip(params, args) if arg[0] not in TRIVIAL_NODES]
+        if not complex_params:
+            return True
+        return not has_calls and [use for use in uses if use in complex_params] == complex_params
+
+    def remove_unreachable(self, ast, definitions):
+        """Drops top-level functions that are not called by the main program or by a reachable function."""
+        pending = list(self.called_functions([node for node in ast if node[0] != "FUNCTION_DEF"]))
+        reachable = set()
+        while pending:
+            name = pending.pop()
+            if name not in reachable:
+                reachable.add(name)
+                if name in definitions:
+                    pending.extend(self.called_functions(definitions[name][3]))
+
+        result = []
+        for node in ast:
+            if node[0] == "FUNCTION_DEF" and node[1] in definitions and node[1] not in reachable:
+                self.changes += 1
+                self.report["removed"].append(node[1])
+            else:
+                result.append(node)
+        return result
+
+    @staticmethod
+    def top_level_functions(ast):
+        """Returns the top-level FUNCTION_DEFs of the names that are defined only once in the program."""
+        definition_counts = {}
+        for node in walk(ast):
+            if node[0] == "FUNCTION_DEF":
+                definition_counts[node[1]] = definition_counts.get(node[1], 0) + 1
+        return {
+            node[1]: node for node in ast
+            if node[0] == "FUNCTION_DEF" and definition_counts[node[1]] == 1
+        }
+
+    @staticmethod
+    def called_functions(nodes):
+        called = set()
+        for node in walk(nodes):
+            if node[0] == "FUNCTION_CALL" and node[1] != "print":
+                called.add(node[1])
+                # parmap calls the function its first argument names
+                if node[1] == "parmap" and node[2] and node[2][0][0] == "IDENTIFIER":
+                    called.add(node[2][0][1])
+        return called
+
+    @staticmethod
+    def is_recursive(name, call_graph):
+        visited = set()
+        pending = list(call_graph.get(name, ()))
+        while pending:
+            callee = pending.pop()
+            if callee == name:
+                return True
+            if callee not in visited:
+                visited.add(callee)
+                pending.extend(call_graph.get(callee, ()))
+        return False
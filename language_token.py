@@ -1,4 +1,18 @@
+from array import array
+
+TOKEN_TYPES = (
+    "NUMBER", "BOOLEAN", "STRING", "IDENTIFIER", "OPERATOR",
+    "IF", "ELSE", "WHILE", "BREAK", "CONTINUE", "RETURN",
+    "TYPE_INT", "TYPE_BOOL", "TYPE_STRING", "TYPE_VOID", "TYPE_LIST",
+    "LPAREN", "RPAREN", "LBRACKET", "RBRACKET", "COMMA", "DOT", "ASSIGN",
+    "INDENT", "DEDENT",
+)
+TOKEN_CODES = {token_type: code for code, token_type in enumerate(TOKEN_TYPES)}
+
+
 class LanguageToken:
+    __slots__ = ("type", "value", "line", "column")
+
     def __init__(self, type, value, line, column):
         self.type = type
         self.value = value
@@ -7,3 +21,53 @@ class LanguageToken:
 
     def __repr__(self):
         return f"Token(type={self.type}, value={self.value}, line={self.line}, column={self.column})"
+
+
+class CompactTokens:
+    """Struct-of-arrays token storage: type codes, lines, columns and value indexes live in parallel arrays.
+
+    Token values are interned into a shared table, so repeated identifiers and keywords are stored once.
+    """
+    def __init__(self, tokens=()):
+        self.types = array("B")
+        self.lines = array("I")
+        self.columns = array("I")
+        self.values = array("I")
+        self.value_table = [None]
+        self.value_indexes = {None: 0}
+        self.extend(tokens)
+
+    def append(self, token):
+        value_index = self.value_indexes.get(token.value)
+        if value_index is None:
+            value_index = self.value_indexes[token.value] = len(self.value_table)
+            self.value_table.append(token.value)
+        self.types.append(TOKEN_CODES[token.type])
+        self.lines.append(token.line)
+        self.columns.append(token.column)
+        self.values.append(value_index)
+
+    def extend(self, tokens):
+        for token in tokens:
+            self.append(token)
+
+    def type_at(self, index):
+        return TOKEN_TYPES[self.types[index]]
+
+    def value_at(self, index):
+        return self.value_table[self.values[index]]
+
+    def __len__(self):
+        return len(self.types)
+
+    def __getitem__(self, index):
+        if index < 0:
+            index += len(self.types)
+        return LanguageToken(self.type_at(index), self.value_at(index), self.lines[index], self.columns[index])
+
+    def __iter__(self):
+        for index in range(len(self.types)):
+            yield self[index]
+
+    def __repr__(self):
+        return repr(list(self))
@@ -1,39 +1,53 @@
+import mmap
 import re
-from language_token import LanguageToken
+from language_token import CompactTokens, LanguageToken
+
+
+def read_lines(source):
+    """Yields the lines of a string, text or binary file object or mmap without line endings."""
+    if isinstance(source, str):
+        yield from source.splitlines()
+        return
+
+    lines = iter(source.readline, b"") if isinstance(source, mmap.mmap) else source
+    for line in lines:
+        if isinstance(line, bytes):
+            line = line.decode("utf-8")
+        yield line.rstrip("\r\n")
 
 
 class Lexer:
-    def __init__(self, source):
-        token_rules = [
-            (r"[ \t]+", None),
-            (r"\/\/.*", None),  # single-line comments
-            (r"\d+", "NUMBER"),
-            (r"true|false", "BOOLEAN"),
-            (r"if", "IF"),
-            (r"else", "ELSE"),
-            (r"while", "WHILE"),
-            (r"break", "BREAK"),
-            (r"continue", "CONTINUE"),
-            (r"return", "RETURN"),
-            (r"int", "TYPE_INT"),
-            (r"bool", "TYPE_BOOL"),
-            (r"str", "TYPE_STRING"),
-            (r"void", "TYPE_VOID"),
-            (r"list\s*<\s*[a-zA-Z_][a-zA-Z0-9_]*\s*>", "TYPE_LIST"),
-            (r"[a-zA-Z_]\w*", "IDENTIFIER"),  # Variable/function names
-            (r"[+\-*<>]|==|!=", "OPERATOR"),  # Arithmetic operators
-            (r"\(", "LPAREN"),
-            (r"\)", "RPAREN"),
-            (r"\[", "LBRACKET"),
-            (r"\]", "RBRACKET"),
-            (r",", "COMMA"),
-            (r"\.", "DOT"),
-            (r"=", "ASSIGN"), # Variable assignment
-            (r'"([^"\\]*(\\.[^"\\]*)*)"', "STRING"),  # Strings (including escaped quotes)
-        ]
-        self.rules = [
-            (re.compile(pattern), token_type) for pattern, token_type in token_rules
-        ]
+    TOKEN_RULES = [
+        (r"[ \t]+", None),
+        (r"\/\/.*", None),  # single-line comments
+        (r"\d+", "NUMBER"),
+        (r"true|false", "BOOLEAN"),
+        (r"if", "IF"),
+        (r"else", "ELSE"),
+        (r"while", "WHILE"),
+        (r"break", "BREAK"),
+        (r"continue", "CONTINUE"),
+        (r"return", "RETURN"),
+        (r"int", "TYPE_INT"),
+        (r"bool", "TYPE_BOOL"),
+        (r"str", "TYPE_STRING"),
+        (r"void", "TYPE_VOID"),
+        (r"list\s*<\s*[a-zA-Z_][a-zA-Z0-9_]*\s*>", "TYPE_LIST"),
+        (r"[a-zA-Z_]\w*", "IDENTIFIER"),  # Variable/function names
+        (r"[+\-*<>]|==|!=", "OPERATOR"),  # Arithmetic operators
+        (r"\(", "LPAREN"),
+        (r"\)", "RPAREN"),
+        (r"\[", "LBRACKET"),
+        (r"\]", "RBRACKET"),
+        (r",", "COMMA"),
+        (r"\.", "DOT"),
+        (r"=", "ASSIGN"), # Variable assignment
+        (r'"([^"\\]*(\\.[^"\\]*)*)"', "STRING"),  # Strings (including escaped quotes)
+    ]
+    # Compiled once and shared by all instances
+    RULES = [(re.compile(pattern), token_type) for pattern, token_type in TOKEN_RULES]
+
+    def __init__(self, source=""):
         self.tokens = []
         self.line = 0
         self.column = 0
@@ -42,27 +56,47 @@ class Lexer:
         self.comment_depth = 0
 
     def tokenize(self):
-        while self.line < len(self.text):
-            text_line = self.text[self.line]
-            self.line += 1
-            self.column = 0
+        self.tokens.extend(self.generate_tokens(self.text))
+        return self.tokens
 
-            # Skip empty lines or lines with only whitespace
-            if not text_line.strip():
-                continue
+    def tokenize_compact(self):
+        """Tokenizes the source straight into a CompactTokens buffer without keeping token objects."""
+        return CompactTokens(self.generate_tokens(self.text))
 
-            if self.comment_depth == 0:
-                # Handle indentation
-                self.tokens.extend(self.handle_indentation(text_line))
+    def stream(self, source):
+        """Lazily yields tokens from a file object or mmap, holding only the current line in memory."""
+        return self.generate_tokens(read_lines(source))
 
-            # Tokenize the rest of the line with regex
-            self.tokens.extend(self.tokenize_line(text_line))
+    def generate_tokens(self, lines):
+        for text_line in lines:
+            yield from self.tokenize_source_line(text_line)
+        yield from self.close_indentation()
+
+    def tokenize_source_line(self, text_line):
+        """Tokenizes one source line, carrying indentation and comment state over to the next line."""
+        self.line += 1
+        self.column = 0
+
+        # Skip empty lines or lines with only whitespace
+        if not text_line.strip():
+            return []
+
+        tokens = []
+        if self.comment_depth == 0:
+            # Handle indentation
+            tokens.extend(self.handle_indentation(text_line))
 
+        # Tokenize the rest of the line with regex
+        tokens.extend(self.tokenize_line(text_line))
+        return tokens
+
+    def close_indentation(self):
         # Emit DEDENT tokens for remaining indentation
+        tokens = []
         while len(self.indent_stack) > 1:
             self.indent_stack.pop()
-            self.tokens.append(LanguageToken(type="DEDENT", value=None, line=self.line, column=self.column))
-        return self.tokens
+            tokens.append(LanguageToken(type="DEDENT", value=None, line=self.line, column=self.column))
+        return tokens
 
     def handle_indentation(self, text_line):
         tokens = []
@@ -103,7 +137,7 @@ class Lexer:
                 continue
 
             match = None
-            for pattern, token_type in self.rules:
+            for pattern, token_type in self.RULES:
                 match = pattern.match(text_line, self.column)
                 if match:
                     value = match.group(0)
@@ -118,4 +152,105 @@ class Lexer:
                 raise SyntaxError(
                     f"Illegal character at line: {self.line}, column: {self.column}"
                 )
-        return tokens
\ No newline at end of file
+        return tokens
+
+
+class SinglePassLexer(Lexer):
+    """Lexer that scans each token with one combined regex instead of trying every rule in turn.
+
+    Emits exactly the same tokens as Lexer, including its prefix behaviour for keywords
+    (e.g. "integer" is lexed as TYPE_INT "int" followed by IDENTIFIER "eger").
+    """
+    MASTER_PATTERN = re.compile(
+        r"(?P<COMMENT_START>/\*)"
+        r"|(?P<WHITESPACE>[ \t]+)"
+        r"|(?P<COMMENT>//.*)"
+        r"|(?P<NUMBER>\d+)"
+        r"|(?P<TYPE_LIST>list\s*<\s*[a-zA-Z_][a-zA-Z0-9_]*\s*>)"
+        r"|(?P<WORD>[a-zA-Z_]\w*)"
+        r"|(?P<OPERATOR>[+\-*<>]|==|!=)"
+        r"|(?P<LPAREN>\()"
+        r"|(?P<RPAREN>\))"
+        r"|(?P<LBRACKET>\[)"
+        r"|(?P<RBRACKET>\])"
+        r"|(?P<COMMA>,)"
+        r"|(?P<DOT>\.)"
+        r"|(?P<ASSIGN>=)"
+        r'|(?P<STRING>"[^"\\]*(?:\\.[^"\\]*)*")'
+    )
+    COMMENT_DELIMITER = re.compile(r"/\*|\*/")
+    # Keywords in the order Lexer tries them, so the first matching prefix wins as before
+    KEYWORDS = {
+        "true": "BOOLEAN",
+        "false": "BOOLEAN",
+        "if": "IF",
+        "else": "ELSE",
+        "while": "WHILE",
+        "break": "BREAK",
+        "continue": "CONTINUE",
+        "return": "RETURN",
+        "int": "TYPE_INT",
+        "bool": "TYPE_BOOL",
+        "str": "TYPE_STRING",
+        "void": "TYPE_VOID",
+    }
+    KEYWORD_PREFIX = re.compile("|".join(KEYWORDS))
+    SKIPPED = {"WHITESPACE", "COMMENT"}
+
+    def __init__(self, source=""):
+        super().__init__(source)
+        self.word_cache = {}
+
+    def match_word(self, word):
+        """Returns (token_type, length) of the token the rule-based lexer would produce at the start of word."""
+        result = self.word_cache.get(word)
+        if result is None:
+            if word in self.KEYWORDS:
+                result = (self.KEYWORDS[word], len(word))
+            else:
+                prefix = self.KEYWORD_PREFIX.match(word)
+                if prefix:
+                    result = (self.KEYWORDS[prefix.group(0)], prefix.end())
+                else:
+                    result = ("IDENTIFIER", len(word))
+            self.word_cache[word] = result
+        return result
+
+    def tokenize_line(self, text_line):
+        """Tokenizes the rest of the line using the combined regex."""
+        tokens = []
+        length = len(text_line)
+        match_token = self.MASTER_PATTERN.match
+        while self.column < length:
+
+            # Skip the comment body up to the next delimiter with a single search
+            if self.comment_depth > 0:
+                delimiter = self.COMMENT_DELIMITER.search(text_line, self.column)
+                if not delimiter:
+                    self.column = length
+                    break
+                self.comment_depth += 1 if delimiter.group(0) == "/*" else -1
+                self.column = delimiter.end()
+                continue
+
+            match = match_token(text_line, self.column)
+            if not match:
+                raise SyntaxError(
+                    f"Illegal character at line: {self.line}, column: {self.column}"
+                )
+
+            token_type = match.lastgroup
+            value = match.group(0)
+            if token_type == "WORD":
+                token_type, word_length = self.match_word(value)
+                value = value[:word_length]
+            elif token_type == "COMMENT_START":
+                self.comment_depth += 1
+                self.column += 2
+                continue
+
+            if token_type not in self.SKIPPED:
+                tokens.append(LanguageToken(token_type, value, self.line, self.column))
+
+            self.column += len(value)
+        return tokens
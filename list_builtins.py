@@ -0,0 +1,175 @@
+import operator
+from array import array
+
+from typed_lists import IntList, ListBehaviour
+
+try:
+    import numpy
+except ImportError:  # Every operation has a pure Python implementation
+    numpy = None
+
+INT64_LIMIT = 2 ** 63
+
+
+def int_view(items):
+    """Returns a zero-copy numpy view of a non-empty IntList, or None if numpy cannot be used."""
+    if numpy is not None and isinstance(items, IntList) and items.values.__class__ is array and len(items):
+        return numpy.frombuffer(items.values, dtype=numpy.int64)
+    return None
+
+
+def largest_magnitude(view):
+    return max(-int(view.min()), int(view.max()))
+
+
+def int_list_from_numpy(values):
+    result = IntList()
+    result.values.frombytes(values.astype(numpy.int64, copy=False).tobytes())
+    return result
+
+
+def is_list(value):
+    return isinstance(value, (list, array, ListBehaviour))
+
+
+def list_length(items):
+    return len(items)
+
+
+def list_append(items, value):
+    items.append(value)
+
+
+def list_slice(items, start, end):
+    if isinstance(items, IntList):
+        return IntList(items.values[start:end])
+    elif isinstance(items, ListBehaviour):
+        return type(items)(items[index] for index in range(*slice(start, end).indices(len(items))))
+    return items[start:end]
+
+
+def list_sum(items):
+    view = int_view(items)
+    # numpy sums wrap around on overflow, so it is only used when the total must fit in 64 bits
+    if view is not None and largest_magnitude(view) * len(view) < INT64_LIMIT:
+        return int(view.sum())
+    return sum(items)
+
+
+def list_min(items):
+    if not len(items):
+        raise ValueError("min() of an empty list")
+    view = int_view(items)
+    return int(view.min()) if view is not None else min(items)
+
+
+def list_max(items):
+    if not len(items):
+        raise ValueError("max() of an empty list")
+    view = int_view(items)
+    return int(view.max()) if view is not None else max(items)
+
+
+def list_sort(items):
+    view = int_view(items)
+    if view is not None:
+        view.sort()  # Sorts the IntList's own array in place
+    else:
+        items.sort()
+
+
+def list_contains(items, value):
+    view = int_view(items)
+    if view is not None and value.__class__ is int and -INT64_LIMIT <= value < INT64_LIMIT:
+        return bool((view == value).any())
+    return value in items
+
+
+def list_index_of(items, value):
+    """Returns the index of the first element equal to value, or -1."""
+    view = int_view(items)
+    if view is not None and value.__class__ is int and -INT64_LIMIT <= value < INT64_LIMIT:
+        matches = numpy.flatnonzero(view == value)
+        return int(matches[0]) if len(matches) else -1
+    try:
+        return items.index(value)
+    except ValueError:
+        return -1
+
+
+def elementwise(operation, items, other):
+    """Applies operation to each element and the matching element of other, or to other itself if it is a number."""
+    if is_list(other):
+        if len(other) != len(items):
+            raise ValueError(
+                f"Element-wise operations need lists of the same length, got {len(items)} and {len(other)}"
+            )
+        view, other_view = int_view(items), int_view(other)
+        if view is not None and other_view is not None:
+            bound = (largest_magnitude(view) * largest_magnitude(other_view) if operation is operator.mul
+                     else largest_magnitude(view) + largest_magnitude(other_view))
+            # numpy wraps around on overflow, so results that might not fit are computed in Python
+            if bound < INT64_LIMIT:
+                return int_list_from_numpy(operation(view, other_view))
+        return IntList(operation(left, right) for left, right in zip(items, other))
+
+    view = int_view(items)
+    if view is not None and other.__class__ is int and -INT64_LIMIT <= other < INT64_LIMIT:
+        bound = (largest_magnitude(view) * abs(other) if operation is operator.mul
+                 else largest_magnitude(view) + abs(other))
+        if bound < INT64_LIMIT:
+            return int_list_from_numpy(operation(view, other))
+    return IntList(operation(value, other) for value in items)
+
+
+def list_add(items, other):
+    return elementwise(operator.add, items, other)
+
+
+def list_subtract(items, other):
+    return elementwise(operator.sub, items, other)
+
+
+def list_multiply(items, other):
+    return elementwise(operator.mul, items, other)
+
+
+def builtin_range(*bounds):
+    """range(end) or range(start, end) as a list<int>."""
+    if not 1 <= len(bounds) <= 2:
+        raise TypeError(f"Function 'range' expects 1 or 2 arguments, got {len(bounds)}")
+    if numpy is not None and all(bound.__class__ is int and abs(bound) < INT64_LIMIT for bound in bounds):
+        return int_list_from_numpy(numpy.arange(*bounds, dtype=numpy.int64))
+    return IntList(range(*bounds))
+
+
+# {method name: (function taking the list and the arguments, number of arguments)}
+LIST_METHODS = {
+    "length": (list_length, 0),
+    "append": (list_append, 1),
+    "slice": (list_slice, 2),
+    "sum": (list_sum, 0),
+    "min": (list_min, 0),
+    "max": (list_max, 0),
+    "sort": (list_sort, 0),
+    "contains": (list_contains, 1),
+    "index_of": (list_index_of, 1),
+    "add": (list_add, 1),
+    "subtract": (list_subtract, 1),
+    "multiply": (list_multiply, 1),
+}
+
+# Functions that can be called without being defined, unless the program defines its own
+BUILTIN_FUNCTIONS = {
+    "range": builtin_range,
+}
+
+
+def list_method(method, arg_count):
+    """Returns the function for a method call, raising the errors of an undefined method or a wrong argument count."""
+    if method not in LIST_METHODS:
+        raise NameError(f"Undefined method '{method}'")
+    function, expected_count = LIST_METHODS[method]
+    if arg_count != expected_count:
+        raise TypeError(f"Method '{method}' expects {expected_count} arguments, got {arg_count}")
+    return function
@@ -0,0 +1,74 @@
+from collections import OrderedDict
+
+from ast_utils import walk
+
+PURE_TYPES = {"int", "str", "bool"}
+MISSING = object()
+
+
+def find_pure_functions(ast):
+    """Returns the names of the functions whose result depends only on their arguments.
+
+    A pure function takes and returns only int, str and bool values, never prints, assigns to
+    list elements or defines functions, and only calls pure functions. Functions that are
+    defined more than once are never pure, since a call could reach either definition.
+    """
+    definitions = {}
+    definition_counts = {}
+    for node in walk(ast):
+        if node[0] == "FUNCTION_DEF":
+            definitions[node[1]] = node
+            definition_counts[node[1]] = definition_counts.get(node[1], 0) + 1
+
+    callees = {}
+    for name, node in definitions.items():
+        _, _, params, body, return_type = node[:5]
+        if (definition_counts[name] > 1 or return_type not in PURE_TYPES
+                or any(param[0] not in PURE_TYPES for param in params)):
+            continue
+        called = set()
+        for child in walk(body):
+            if child[0] in ("INDEX_ASSIGNMENT", "FUNCTION_DEF"):
+                break
+            elif child[0] == "FUNCTION_CALL":
+                called.add(child[1])
+        else:
+            callees[name] = called
+
+    # Start from the candidates and drop callers of impure functions until nothing changes
+    pure = set(callees)
+    changed = True
+    while changed:
+        changed = False
+        for name in list(pure):
+            if not callees[name] <= pure:
+                pure.discard(name)
+                changed = True
+    return pure
+
+
+class MemoCache:
+    """Results of one function keyed by its arguments, evicting the least recently used beyond max_size."""
+    def __init__(self, max_size):
+        self.max_size = max_size
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def lookup(self, key):
+        """Returns the cached result for the arguments, or MISSING."""
+        value = self.entries.get(key, MISSING)
+        if value is MISSING:
+            self.misses += 1
+        else:
+            self.hits += 1
+            self.entries.move_to_end(key)
+        return value
+
+    def store(self, key, value):
+        self.entries[key] = value
+        if len(self.entries) > self.max_size:
+            self.entries.popitem(last=False)
+
+    def stats(self):
+        return {"hits": self.hits, "misses": self.misses, "size": len(self.entries)}
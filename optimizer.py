@@ -0,0 +1,222 @@
+import operator
+
+from ast_utils import AstTransformer, count_nodes
+
+CONSTANT_NODES = {"NUMBER", "STRING", "BOOLEAN"}
+TERMINAL_NODES = {"RETURN", "BREAK", "CONTINUE"}
+
+
+def constant_value(node):
+    if node[0] == "NUMBER":
+        return float(node[1]) if "." in node[1] else int(node[1])
+    elif node[0] == "BOOLEAN":
+        return node[1] == "true"
+    return node[1]
+
+
+def constant_node(value):
+    """Returns the AST node for a folded value, or None if the value has no literal form."""
+    if isinstance(value, bool):
+        return "BOOLEAN", "true" if value else "false"
+    elif isinstance(value, int):
+        return "NUMBER", str(value)
+    elif isinstance(value, float):
+        text = repr(value)
+        # NUMBER literals are read back as floats only when they contain a dot
+        return ("NUMBER", text) if "." in text and "e" not in text else None
+    elif isinstance(value, str) and len(value) <= ConstantFolder.MAX_STRING_LENGTH:
+        return "STRING", value
+    return None
+
+
+def string_result_length(operator_symbol, left, right):
+    """Returns the length of the string that + or * would build from the operands, or 0 for other results."""
+    if operator_symbol == "+" and isinstance(left, str) and isinstance(right, str):
+        return len(left) + len(right)
+    elif operator_symbol == "*":
+        if isinstance(left, str) and isinstance(right, int):
+            return len(left) * right
+        elif isinstance(right, str) and isinstance(left, int):
+            return len(right) * left
+    return 0
+
+
+class ConstantFolder(AstTransformer):
+    """Evaluates BIN_OPs on constants and constant placeholders of interpolated strings at compile time."""
+    MAX_STRING_LENGTH = 4096
+    OPERATORS = {
+        "+": operator.add,
+        "-": operator.sub,
+        "*": operator.mul,
+        "/": operator.truediv,
+        ">": operator.gt,
+        "<": operator.lt,
+        "==": operator.eq,
+        "!=": operator.ne,
+    }
+
+    def __init__(self):
+        self.changes = 0
+
+    def visit_expression(self, node):
+        node = self.rebuild(node)
+
+        if (node[0] == "BIN_OP" and node[1] in self.OPERATORS
+                and node[2][0] in CONSTANT_NODES and node[3][0] in CONSTANT_NODES):
+            left, right = constant_value(node[2]), constant_value(node[3])
+            # Strings too long to fold are never built, so a huge repetition costs nothing at compile time
+            if string_result_length(node[1], left, right) > self.MAX_STRING_LENGTH:
+                folded = None
+            else:
+                try:
+                    folded = constant_node(self.OPERATORS[node[1]](left, right))
+                except Exception:
+                    # Errors such as division by zero are left to be raised at run time
+                    folded = None
+            if folded:
+                self.changes += 1
+                return folded
+
+        elif node[0] == "INTERPOLATED_STRING":
+            parts = []
+            for part in node[1]:
+                if isinstance(part, tuple) and part[0] in CONSTANT_NODES:
+                    self.changes += 1
+                    part = str(constant_value(part))
+                if isinstance(part, str) and parts and isinstance(parts[-1], str):
+                    parts[-1] += part
+                else:
+                    parts.append(part)
+            if all(isinstance(part, str) for part in parts):
+                return "STRING", "".join(parts)
+            return "INTERPOLATED_STRING", parts
+
+        return node
+
+
+class ConstantPropagator(AstTransformer):
+    """Replaces reads of variables that are declared once with a constant and never reassigned.
+
+    Only declarations directly in a function body or at the top level are used, since a
+    declaration nested in an if or while block may not have run when the variable is read.
+    """
+    def __init__(self):
+        self.changes = 0
+        self.constants = {}
+        self.stable_names = set()
+        self.at_scope_top = True
+
+    def transform(self, ast):
+        return self.visit_function_body(ast)
+
+    def visit_function_body(self, nodes):
+        outer_scope = self.constants, self.stable_names, self.at_scope_top
+        self.constants, self.stable_names, self.at_scope_top = {}, self.find_stable_names(nodes), True
+        body = self.visit_block(nodes)
+        self.constants, self.stable_names, self.at_scope_top = outer_scope
+        return body
+
+    def visit_block(self, nodes):
+        at_scope_top = self.at_scope_top
+        self.at_scope_top = False
+        block = []
+        for node in nodes:
+            node = self.visit_statement(node)
+            block.append(node)
+            if (at_scope_top and node[0] == "VAR_DECLARATION" and node[3][0] in CONSTANT_NODES
+                    and node[2] in self.stable_names):
+                self.constants[node[2]] = node[3]
+        self.at_scope_top = at_scope_top
+        return block
+
+    def visit_expression(self, node):
+        if node[0] == "IDENTIFIER" and node[1] in self.constants:
+            self.changes += 1
+            return self.constants[node[1]]
+        elif node[0] == "FUNCTION_CALL" and node[1] == "parmap" and node[2]:
+            # The first argument of parmap names a function, not a variable
+            return node[0], node[1], node[2][:1] + [self.visit_expression(arg) for arg in node[2][1:]]
+        return self.rebuild(node)
+
+    @staticmethod
+    def find_stable_names(nodes):
+        """Returns the names declared exactly once and never assigned in a scope, ignoring nested functions."""
+        declarations = {}
+        assigned = set()
+        stack = list(nodes)
+        while stack:
+            node = stack.pop()
+            if node[0] == "VAR_DECLARATION":
+                declarations[node[2]] = declarations.get(node[2], 0) + 1
+            elif node[0] in ("ASSIGNMENT", "INDEX_ASSIGNMENT"):
+                assigned.add(node[1])
+            elif node[0] == "IF":
+                stack.extend(node[2])
+                stack.extend(node[3] or [])
+            elif node[0] == "WHILE":
+                stack.extend(node[2])
+        return {name for name, count in declarations.items() if count == 1 and name not in assigned}
+
+
+class DeadCodeEliminator(AstTransformer):
+    """Removes branches with constant conditions and statements that follow a return, break or continue."""
+    def __init__(self):
+        self.changes = 0
+
+    def visit_block(self, nodes):
+        block = []
+        for index, node in enumerate(nodes):
+            node = self.visit_statement(node)
+
+            if node[0] == "IF" and node[1][0] == "BOOLEAN":
+                self.changes += 1
+                block.extend(node[2] if node[1][1] == "true" else node[3] or [])
+            elif node[0] == "WHILE" and node[1] == ("BOOLEAN", "false"):
+                self.changes += 1
+            else:
+                block.append(node)
+
+            if block and block[-1][0] in TERMINAL_NODES:
+                if index + 1 < len(nodes):
+                    self.changes += 1
+                break
+        return block
+
+
+class Optimizer:
+    """Simplifies a type-checked AST before it is evaluated.
+
+    Each transform can be switched off. After optimize() the stats attribute holds the node
+    counts before and after each transform and the number of rewrites it made.
+    """
+    def __init__(self, fold_constants=True, propagate_constants=True, eliminate_dead_code=True):
+        self.passes = []
+        if fold_constants:
+            self.passes.append(("fold_constants", ConstantFolder))
+        if propagate_constants:
+            self.passes.append(("propagate_constants", ConstantPropagator))
+            if fold_constants:
+                # Propagated constants usually make more expressions foldable
+                self.passes.append(("fold_propagated_constants", ConstantFolder))
+        if eliminate_dead_code:
+            self.passes.append(("eliminate_dead_code", DeadCodeEliminator))
+        self.stats = {}
+
+    def optimize(self, ast):
+        self.stats = {}
+        for name, transformer_class in self.passes:
+            transformer = transformer_class()
+            nodes_before = count_nodes(ast)
+            ast = transformer.transform(ast)
+            self.stats[name] = {
+                "nodes_before": nodes_before,
+                "nodes_after": count_nodes(ast),
+                "changes": transformer.changes,
+            }
+        return ast
+
+    def report(self):
+        lines = [f"{'transform':28}{'nodes before':>14}{'nodes after':>14}{'changes':>10}"]
+        for name, stats in self.stats.items():
+            lines.append(f"{name:28}{stats['nodes_before']:14}{stats['nodes_after']:14}{stats['changes']:10}")
+        return "\n".join(lines)
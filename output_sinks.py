@@ -0,0 +1,135 @@
+import atexit
+import sys
+
+DEFAULT_BUFFER_SIZE = 64 * 1024  # Characters a sink collects before passing them on
+
+# Every BufferedSink that has not been closed yet, closed when the interpreter exits. The set holds
+# strong references, so a sink that a caller dropped without closing still gets its text out.
+open_sinks = set()
+
+
+def write_line(output, values):
+    """Writes the values the way print(*values) does, with a single write to output (sys.stdout if None)."""
+    (sys.stdout if output is None else output).write(" ".join([str(value) for value in values]) + "\n")
+
+
+def close_all():
+    for sink in list(open_sinks):
+        sink.close()
+
+
+atexit.register(close_all)
+
+
+class OutputSink:
+    """Base class of the objects that engines print to.
+
+    Engines only call write(text), so any file-like object works as an output as well. A sink
+    can be used as a context manager that closes it, which flushes what it still holds.
+    """
+    def write(self, text):
+        raise NotImplementedError
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.flush()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+class MemorySink(OutputSink):
+    """Keeps everything written in memory; getvalue() returns it as one string."""
+    def __init__(self):
+        self.chunks = []
+        self.write = self.chunks.append  # Skips a Python-level call for every line
+
+    def getvalue(self):
+        if len(self.chunks) > 1:
+            self.chunks[:] = ["".join(self.chunks)]
+        return self.chunks[0] if self.chunks else ""
+
+    def clear(self):
+        self.chunks.clear()
+
+
+class BufferedSink(OutputSink):
+    """Collects written text and passes it to emit() in batches of at least buffer_size characters.
+
+    With buffer_size=0 every write is passed on at once. Whatever is still buffered is emitted by
+    flush() and close(). A sink that is never closed is kept alive and closed when the interpreter
+    exits, so its text is not lost with it.
+    """
+    def __init__(self, buffer_size=DEFAULT_BUFFER_SIZE):
+        self.buffer_size = buffer_size
+        self.parts = []
+        self.size = 0
+        self.closed = False
+        open_sinks.add(self)
+
+    def write(self, text):
+        if self.closed:
+            raise ValueError("Write to a closed sink")
+        self.parts.append(text)
+        self.size += len(text)
+        if self.size >= self.buffer_size:
+            self.flush_buffer()
+
+    def flush_buffer(self):
+        if self.parts:
+            text = "".join(self.parts)
+            self.parts.clear()
+            self.size = 0
+            self.emit(text)
+
+    def flush(self):
+        self.flush_buffer()
+
+    def close(self):
+        if not self.closed:
+            self.flush()
+            self.closed = True
+            open_sinks.discard(self)
+
+    def emit(self, text):
+        raise NotImplementedError
+
+
+class FileSink(BufferedSink):
+    """Writes to a file object, or to a file it opens when given a path, buffer_size characters at a time.
+
+    flush() also flushes the file. close() closes the file only if the sink opened it, so
+    FileSink(sys.stdout) batches console output without closing stdout.
+    """
+    def __init__(self, file, buffer_size=DEFAULT_BUFFER_SIZE, encoding="utf-8"):
+        self.owns_file = isinstance(file, str)
+        self.file = open(file, "w", encoding=encoding) if self.owns_file else file
+        super().__init__(buffer_size)
+
+    def emit(self, text):
+        self.file.write(text)
+
+    def flush(self):
+        self.flush_buffer()
+        self.file.flush()
+
+    def close(self):
+        if not self.closed:
+            super().close()
+            if self.owns_file:
+                self.file.close()
+
+
+class CallbackSink(BufferedSink):
+    """Passes the written text to callback(text) in batches of at least buffer_size characters."""
+    def __init__(self, callback, buffer_size=DEFAULT_BUFFER_SIZE):
+        self.callback = callback
+        super().__init__(buffer_size)
+
+    def emit(self, text):
+        self.callback(text)
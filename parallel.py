@@ -0,0 +1,117 @@
+import atexit
+import os
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+
+from ast_utils import walk
+from resolver import Resolver
+
+# parmap(f, xs) runs serially when xs has fewer elements than this
+THRESHOLD = int(os.environ.get("VALOLANG_PARMAP_THRESHOLD", "1000"))
+WORKERS = int(os.environ.get("VALOLANG_PARMAP_WORKERS", "0")) or os.cpu_count() or 1
+CHUNKS_PER_WORKER = 4
+
+pool = None
+in_worker = False  # True in pool processes, where a nested parmap runs serially
+
+
+def configure(threshold=None, workers=None, chunks_per_worker=None):
+    """Changes the parmap settings; a new worker count takes effect with a new pool."""
+    global THRESHOLD, WORKERS, CHUNKS_PER_WORKER
+    if threshold is not None:
+        THRESHOLD = threshold
+    if chunks_per_worker is not None:
+        CHUNKS_PER_WORKER = chunks_per_worker
+    if workers is not None and workers != WORKERS:
+        WORKERS = workers
+        shutdown()
+
+
+def shutdown():
+    global pool
+    if pool is not None:
+        pool.shutdown()
+        pool = None
+
+
+atexit.register(shutdown)
+
+
+def mark_worker():
+    global in_worker
+    in_worker = True
+
+
+def get_pool():
+    global pool
+    if pool is None:
+        pool = ProcessPoolExecutor(WORKERS, initializer=mark_worker)
+    return pool
+
+
+def reachable_functions(bodies, name):
+    """Returns the names of the function and of every function it can call, given {name: body}."""
+    reached = set()
+    pending = [name]
+    while pending:
+        function_name = pending.pop()
+        if function_name in reached or function_name not in bodies:
+            continue
+        reached.add(function_name)
+        pending.extend(node[1] for node in walk(bodies[function_name]) if node[0] == "FUNCTION_CALL")
+    return reached
+
+
+def function_table(ast, name):
+    """Returns {name: (params, resolved body, frame size)} of the function and its callees in an unresolved AST.
+
+    This is the form of Evaluator.functions, and what the worker processes run.
+    """
+    definitions = {node[1]: node for node in walk(ast) if node[0] == "FUNCTION_DEF"}
+    table = {}
+    for function_name in reachable_functions({key: node[3] for key, node in definitions.items()}, name):
+        resolved, _ = Resolver().resolve([definitions[function_name]])
+        _, _, params, body, _, frame_size = resolved[0]
+        table[function_name] = (params, body, frame_size)
+    return table
+
+
+def map_chunk(functions, name, values):
+    """Calls the function on each value with an Evaluator that knows only the given functions."""
+    from evaluator import Evaluator  # evaluator imports this module
+
+    evaluator = Evaluator()
+    evaluator.functions = dict(functions)
+    evaluator.memoize_functions(functions)  # parmap only accepts pure functions
+    _, body, frame_size = functions[name]
+    return [evaluator.call_function(name, body, frame_size, [value]) for value in values]
+
+
+def parmap(name, values, functions, serial_call=None):
+    """Returns [name(value) for value in values], computed on the worker pool for large inputs.
+
+    functions is the function table from function_table() or Evaluator.functions; it must contain
+    the function and every function it calls. Inputs below THRESHOLD run serially in this process,
+    through serial_call if the engine gives one. The values are split into CHUNKS_PER_WORKER chunks
+    per worker and the results are returned in order.
+    """
+    if name not in functions:
+        raise NameError(f"Undefined function '{name}'")
+    params = functions[name][0]
+    if len(params) != 1:
+        raise TypeError(f"Function '{name}' expects {len(params)} arguments, got 1")
+
+    values = list(values)
+    if in_worker or WORKERS <= 1 or len(values) < THRESHOLD:
+        if serial_call is None:
+            return map_chunk(functions, name, values)
+        return [serial_call(value) for value in values]
+
+    functions = {key: functions[key] for key in reachable_functions(
+        {key: function[1] for key, function in functions.items()}, name)}
+    chunk_size = -(-len(values) // (WORKERS * CHUNKS_PER_WORKER))
+    chunks = [values[start:start + chunk_size] for start in range(0, len(values), chunk_size)]
+    results = []
+    for chunk_results in get_pool().map(map_chunk, repeat(functions), repeat(name), chunks):
+        results.extend(chunk_results)
+    return results
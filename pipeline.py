@@ -0,0 +1,146 @@
+import time
+import tracemalloc
+
+from ast_utils import count_nodes
+from evaluator import Evaluator
+from lexer import SinglePassLexer
+from token_parser import TokenParser
+from type_checker import TypeChecker
+
+PHASES = ("lex", "parse", "check", "evaluate")
+
+
+class RunStats:
+    """Measurements of one run through the pipeline.
+
+    phase_times holds the wall time in seconds of every phase that started. peak_memory is the
+    peak traced memory in bytes, or None when memory was not traced.
+    """
+    def __init__(self):
+        self.phase_times = {}
+        self.token_count = 0
+        self.node_count = 0
+        self.nodes_evaluated = 0
+        self.function_calls = 0
+        self.peak_memory = None
+
+    @property
+    def total_time(self):
+        return sum(self.phase_times.values())
+
+    def as_dict(self):
+        return {
+            "phase_times": dict(self.phase_times),
+            "token_count": self.token_count,
+            "node_count": self.node_count,
+            "nodes_evaluated": self.nodes_evaluated,
+            "function_calls": self.function_calls,
+            "peak_memory": self.peak_memory,
+        }
+
+    def __repr__(self):
+        return f"RunStats({self.as_dict()})"
+
+
+class PipelineHooks:
+    """Base class for objects notified around every phase; override the methods that are needed.
+
+    phase_finished is called even when the phase raises, before the exception reaches the caller.
+    """
+    def phase_started(self, phase, stats):
+        pass
+
+    def phase_finished(self, phase, stats):
+        pass
+
+
+class CallbackHooks(PipelineHooks):
+    """Calls on_start(phase, stats) and on_finish(phase, stats), either of which may be None."""
+    def __init__(self, on_start=None, on_finish=None):
+        self.on_start = on_start
+        self.on_finish = on_finish
+
+    def phase_started(self, phase, stats):
+        if self.on_start is not None:
+            self.on_start(phase, stats)
+
+    def phase_finished(self, phase, stats):
+        if self.on_finish is not None:
+            self.on_finish(phase, stats)
+
+
+class CountingEvaluator(Evaluator):
+    """Evaluator that counts the nodes it evaluates and the function calls it makes.
+
+    Calls answered from a memo cache do not run, so they are not counted.
+    """
+    def __init__(self, **options):
+        super().__init__(**options)
+        self.nodes_evaluated = 0
+        self.function_calls = 0
+
+    def eval_node(self, node, frame):
+        self.nodes_evaluated += 1
+        return super().eval_node(node, frame)
+
+    def call_function(self, name, body, frame_size, arg_values):
+        self.function_calls += 1
+        return super().call_function(name, body, frame_size, arg_values)
+
+
+class Pipeline:
+    """Lexes, parses, type-checks and evaluates a source in one call and measures every phase.
+
+    run() returns the evaluator that ran the program and a RunStats. Memory tracing slows the run
+    down considerably, so it can be turned off with trace_memory=False. Evaluator options such as
+    memoize are passed on to the CountingEvaluator.
+    """
+    def __init__(self, hooks=(), type_check=True, trace_memory=True, **evaluator_options):
+        self.hooks = list(hooks)
+        self.type_check = type_check
+        self.trace_memory = trace_memory
+        self.evaluator_options = evaluator_options
+
+    def run(self, source):
+        stats = RunStats()
+        started_tracing = self.trace_memory and not tracemalloc.is_tracing()
+        if started_tracing:
+            tracemalloc.start()
+        elif self.trace_memory:
+            tracemalloc.reset_peak()
+        try:
+            tokens = self.phase("lex", stats, lambda: SinglePassLexer(source).tokenize())
+            stats.token_count = len(tokens)
+            ast = self.phase("parse", stats, lambda: TokenParser(tokens).parse())
+            stats.node_count = count_nodes(ast)
+            if self.type_check:
+                self.phase("check", stats, lambda: TypeChecker().check(ast))
+
+            evaluator = CountingEvaluator(**self.evaluator_options)
+            try:
+                self.phase("evaluate", stats, lambda: evaluator.evaluate(ast))
+            finally:
+                stats.nodes_evaluated = evaluator.nodes_evaluated
+                stats.function_calls = evaluator.function_calls
+        finally:
+            if self.trace_memory:
+                stats.peak_memory = tracemalloc.get_traced_memory()[1]
+            if started_tracing:
+                tracemalloc.stop()
+        return evaluator, stats
+
+    def phase(self, name, stats, function):
+        for hook in self.hooks:
+            hook.phase_started(name, stats)
+        start = time.perf_counter()
+        try:
+            return function()
+        finally:
+            stats.phase_times[name] = time.perf_counter() - start
+            for hook in self.hooks:
+                hook.phase_finished(name, stats)
+
+
+def run(source, hooks=(), **options):
+    """Runs the source through a Pipeline and returns the evaluator and the RunStats."""
+    return Pipeline(hooks, **options).run(source)
@@ -0,0 +1,154 @@
+import argparse
+import json
+import sys
+import time
+
+from evaluator import Evaluator
+from lexer import SinglePassLexer
+from resolver import Resolver
+from token_parser import TokenParser
+
+MAIN = "<main>"
+
+
+class ProfilingEvaluator(Evaluator):
+    """Evaluator that records the calls, inclusive time and exclusive time of every valolang
+    function and how many statements ran on every source line.
+
+    Profiling lives in this subclass, so the plain Evaluator pays nothing for it. Line numbers
+    come from the node_positions of the TokenParser that built the AST; without them only the
+    functions are profiled. Time outside any function is reported under "<main>". Inclusive time
+    counts only the outermost call of a recursive function, and calls answered from a memo cache
+    never run, so they are not counted; pass memoize=False to profile every call.
+    """
+    def __init__(self, node_positions=None, clock=time.perf_counter, **options):
+        super().__init__(**options)
+        self.node_positions = node_positions or {}
+        self.clock = clock
+        self.positions = {}  # {id(resolved statement): (line, column)}
+        self.function_profiles = {}  # {name: [calls, inclusive seconds, exclusive seconds]}
+        self.line_hits = {}  # {line: statements run}
+        self.stacks = {}  # {(MAIN, ..., caller, function): exclusive seconds}
+        self.call_stack = []  # [name, stack, start time, time spent in callees] of each running call
+        self.active_calls = {}  # {name: number of its calls on call_stack}
+
+    def evaluate(self, ast, variables=None):
+        self.enter(MAIN)
+        try:
+            super().evaluate(ast, variables)
+        finally:
+            self.leave()
+
+    def resolve(self, ast, variables=()):
+        resolver = Resolver(self.node_positions)
+        resolved = resolver.resolve(ast, variables)
+        self.positions = resolver.resolved_positions
+        return resolved
+
+    def eval_nodes(self, ast, frame):
+        positions = self.positions
+        line_hits = self.line_hits
+        control_nodes = self.CONTROL_NODES
+        for node in ast:
+            position = positions.get(id(node))
+            if position is not None:
+                line_hits[position[0]] = line_hits.get(position[0], 0) + 1
+            signal = self.eval_node(node, frame)
+            if signal is not None and node[0] in control_nodes:
+                return signal
+        return None
+
+    def call_function(self, name, body, frame_size, arg_values):
+        self.enter(name)
+        try:
+            return super().call_function(name, body, frame_size, arg_values)
+        finally:
+            self.leave()
+
+    def enter(self, name):
+        stack = self.call_stack[-1][1] + (name,) if self.call_stack else (name,)
+        self.call_stack.append([name, stack, self.clock(), 0.0])
+        self.active_calls[name] = self.active_calls.get(name, 0) + 1
+
+    def leave(self):
+        name, stack, start, callee_time = self.call_stack.pop()
+        elapsed = self.clock() - start
+        exclusive = elapsed - callee_time
+        self.active_calls[name] -= 1
+
+        profile = self.function_profiles.setdefault(name, [0, 0.0, 0.0])
+        profile[0] += 1
+        if not self.active_calls[name]:
+            profile[1] += elapsed
+        profile[2] += exclusive
+        self.stacks[stack] = self.stacks.get(stack, 0.0) + exclusive
+        if self.call_stack:
+            self.call_stack[-1][3] += elapsed
+
+    def format_report(self, source=None, max_lines=20):
+        """Returns the functions sorted by exclusive time and the most executed source lines."""
+        lines = [f"{'function':24} {'calls':>8} {'inclusive ms':>13} {'exclusive ms':>13} {'ms per call':>12}"]
+        for name, (calls, inclusive, exclusive) in sorted(
+                self.function_profiles.items(), key=lambda item: item[1][2], reverse=True):
+            lines.append(f"{name:24} {calls:8} {inclusive * 1000:13.3f} {exclusive * 1000:13.3f} "
+                         f"{inclusive / calls * 1000:12.4f}")
+
+        if self.line_hits:
+            source_lines = source.splitlines() if source is not None else []
+            lines.append("")
+            lines.append(f"{'line':>6} {'hits':>10}")
+            for line, hits in sorted(self.line_hits.items(), key=lambda item: (-item[1], item[0]))[:max_lines]:
+                text = source_lines[line - 1].strip() if line <= len(source_lines) else ""
+                lines.append(f"{line:6} {hits:10}  {text}".rstrip())
+        return "\n".join(lines)
+
+    def to_json(self):
+        return {
+            "functions": {
+                name: {"calls": calls, "inclusive_seconds": inclusive, "exclusive_seconds": exclusive}
+                for name, (calls, inclusive, exclusive) in self.function_profiles.items()
+            },
+            "lines": {str(line): hits for line, hits in sorted(self.line_hits.items())},
+        }
+
+    def collapsed_stacks(self):
+        """Returns the exclusive time of every call stack in microseconds, in the collapsed format of
+        flame graph tools."""
+        return "".join(
+            f"{';'.join(stack)} {round(seconds * 1_000_000)}\n" for stack, seconds in sorted(self.stacks.items())
+        )
+
+
+def profile(source, **options):
+    """Parses and runs the source with a ProfilingEvaluator and returns the evaluator."""
+    parser = TokenParser(SinglePassLexer(source).tokenize())
+    ast = parser.parse()
+    evaluator = ProfilingEvaluator(parser.node_positions, **options)
+    evaluator.evaluate(ast)
+    return evaluator
+
+
+def main(arguments=None):
+    parser = argparse.ArgumentParser(description="Run a valolang script and report where its time goes.")
+    parser.add_argument("script", help="valolang source file")
+    parser.add_argument("--json", help="also write the profile as JSON to this file")
+    parser.add_argument("--collapsed", help="also write collapsed call stacks for flame graphs to this file")
+    parser.add_argument("--lines", type=int, default=20, help="number of source lines in the report")
+    parser.add_argument("--no-memoize", action="store_true", help="run every call instead of using memo caches")
+    options = parser.parse_args(arguments)
+
+    with open(options.script, encoding="utf-8") as source_file:
+        source = source_file.read()
+    evaluator = profile(source, memoize=not options.no_memoize)
+
+    print(evaluator.format_report(source, options.lines))
+    if options.json:
+        with open(options.json, "w", encoding="utf-8") as file:
+            json.dump(evaluator.to_json(), file, indent=2)
+    if options.collapsed:
+        with open(options.collapsed, "w", encoding="utf-8") as file:
+            file.write(evaluator.collapsed_stacks())
+
+
+if __name__ == "__main__":
+    sys.exit(main())
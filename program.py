@@ -0,0 +1,96 @@
+import io
+from types import MappingProxyType
+
+from evaluator import Evaluator
+from lexer import SinglePassLexer
+from memoization import find_pure_functions
+from resolver import UNSET, Resolver
+from token_parser import TokenParser
+from type_checker import TypeChecker
+from typed_lists import typed_list
+
+SCALAR_TYPES = {"int": int, "str": str, "bool": bool}
+
+
+def check_input(name, declared_type, value):
+    """Returns the value to store in the input variable, raising TypeError if it does not have the declared type."""
+    if declared_type in SCALAR_TYPES:
+        if value.__class__ is SCALAR_TYPES[declared_type]:
+            return value
+    elif declared_type.startswith("list<") and isinstance(value, (list, tuple)):
+        element_type = SCALAR_TYPES.get(declared_type[5:-1])
+        if element_type is not None and all(element.__class__ is element_type for element in value):
+            # Copied, so index assignments in the program never change the caller's list
+            return typed_list(declared_type, list(value))
+    raise TypeError(f"Input '{name}' expects {declared_type}, got {type(value).__name__}")
+
+
+class Program:
+    """A source that is lexed, parsed, type-checked and resolved once and can then be run many times.
+
+    inputs maps the names of input variables to their types, e.g. {"count": "int"}. They are
+    global variables that the program can use without declaring them, and every run() supplies
+    their values. Each run gets a new Evaluator with its own frame, memo caches and output, and
+    nothing a run does is stored on the Program, so one Program can be run from several threads
+    at once. Evaluator options such as memoize apply to every run.
+
+    A ProgramCache can be passed to skip lexing and parsing of sources it has seen before.
+    """
+    __slots__ = ("source", "inputs", "ast", "resolved_ast", "frame_size", "pure_functions", "evaluator_options")
+
+    def __init__(self, source, inputs=None, cache=None, **evaluator_options):
+        inputs = dict(inputs or {})
+        if cache is not None:
+            ast = cache.compile(source, type_check=False)
+        else:
+            ast = TokenParser(SinglePassLexer(source).tokenize()).parse()
+
+        type_checker = TypeChecker()
+        type_checker.scope.update(inputs)
+        type_checker.check(ast)
+        resolved_ast, frame_size = Resolver().resolve(ast, list(inputs))
+
+        set_attribute = super().__setattr__
+        set_attribute("source", source)
+        set_attribute("inputs", MappingProxyType(inputs))
+        set_attribute("ast", tuple(ast))
+        set_attribute("resolved_ast", tuple(resolved_ast))
+        set_attribute("frame_size", frame_size)
+        set_attribute("pure_functions", frozenset(find_pure_functions(ast)))
+        set_attribute("evaluator_options", MappingProxyType(evaluator_options))
+
+    def __setattr__(self, name, value):
+        raise AttributeError("Program objects are immutable")
+
+    def __delattr__(self, name):
+        raise AttributeError("Program objects are immutable")
+
+    def run(self, inputs=None, output=None):
+        """Runs the program with the given input values, printing to output (sys.stdout if None).
+
+        Returns the Evaluator of the run, e.g. for its memo_stats().
+        """
+        inputs = inputs or {}
+        missing = [name for name in self.inputs if name not in inputs]
+        if missing:
+            raise TypeError(f"Missing inputs: {', '.join(missing)}")
+        unexpected = [name for name in inputs if name not in self.inputs]
+        if unexpected:
+            raise TypeError(f"Unexpected inputs: {', '.join(unexpected)}")
+
+        frame = [check_input(name, declared_type, inputs[name]) for name, declared_type in self.inputs.items()]
+        frame.extend([UNSET] * (self.frame_size - len(frame)))
+
+        evaluator = Evaluator(output=output, **self.evaluator_options)
+        evaluator.memoize_functions(self.pure_functions if evaluator.memoize else ())
+        evaluator.eval_nodes(self.resolved_ast, frame)
+        return evaluator
+
+    def run_to_string(self, inputs=None):
+        """Runs the program and returns what it printed."""
+        output = io.StringIO()
+        self.run(inputs, output)
+        return output.getvalue()
+
+    def __repr__(self):
+        return f"Program({len(self.ast)} statements, inputs={dict(self.inputs)})"
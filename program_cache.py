@@ -0,0 +1,163 @@
+import argparse
+import hashlib
+import marshal
+import os
+import sys
+import tempfile
+
+from lexer import SinglePassLexer
+from token_parser import TokenParser
+from type_checker import TypeChecker
+
+# Bump whenever the AST layout produced by TokenParser changes, so older cache files are ignored
+AST_FORMAT_VERSION = 3
+MAGIC = b"VALC"
+HEADER = MAGIC + AST_FORMAT_VERSION.to_bytes(2, "little") + marshal.version.to_bytes(2, "little")
+DIGEST_SIZE = 32
+SUFFIX = ".vlc"
+DEFAULT_DIRECTORY = os.environ.get("VALOLANG_CACHE_DIR") or os.path.join(
+    os.path.expanduser("~"), ".cache", "valolang"
+)
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+
+
+class ProgramCache:
+    """Stores parsed, type-checked ASTs on disk so that running an unchanged script skips the front end.
+
+    Files are named after a SHA-256 of the source, the AST format version and the marshal
+    version, and start with a header and the digest so that stale or damaged files are
+    detected on load and removed. When the directory grows beyond max_bytes, the least
+    recently used files (by modification time, which a cache hit refreshes) are deleted.
+    """
+    def __init__(self, directory=DEFAULT_DIRECTORY, max_bytes=DEFAULT_MAX_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+
+    def compile(self, source, type_check=True):
+        """Returns the AST of the source, from the cache if possible."""
+        digest = self.digest(source, type_check)
+        ast = self.load(digest)
+        if ast is not None:
+            self.hits += 1
+            return ast
+
+        self.misses += 1
+        ast = TokenParser(SinglePassLexer(source).tokenize()).parse()
+        if type_check:
+            TypeChecker().check(ast)
+        self.store(digest, ast)
+        return ast
+
+    @staticmethod
+    def digest(source, type_check=True):
+        hasher = hashlib.sha256(HEADER)
+        hasher.update(b"checked" if type_check else b"unchecked")
+        hasher.update(source.encode("utf-8"))
+        return hasher.digest()
+
+    def path(self, digest):
+        return os.path.join(self.directory, digest.hex() + SUFFIX)
+
+    def load(self, digest):
+        """Returns the cached AST for the digest, or None if there is no valid cache file."""
+        path = self.path(digest)
+        try:
+            with open(path, "rb") as file:
+                data = file.read()
+        except OSError:
+            return None
+
+        prefix = HEADER + digest
+        ast = None
+        if data.startswith(prefix):
+            try:
+                ast = marshal.loads(data[len(prefix):])
+            except (EOFError, ValueError, TypeError):
+                ast = None
+        if not isinstance(ast, list):
+            self.remove(path)
+            return None
+
+        try:
+            os.utime(path)  # Marks the file as recently used for eviction
+        except OSError:
+            pass
+        return ast
+
+    def store(self, digest, ast):
+        os.makedirs(self.directory, exist_ok=True)
+        # Written to a temporary file first so a concurrent reader never sees a partial file
+        descriptor, temporary_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(descriptor, "wb") as file:
+                file.write(HEADER + digest + marshal.dumps(ast))
+            os.replace(temporary_path, self.path(digest))
+        except BaseException:
+            self.remove(temporary_path)
+            raise
+        self.prune()
+
+    def entries(self):
+        """Returns (modification time, size, path) of every cache file, oldest first."""
+        entries = []
+        try:
+            names = os.listdir(self.directory)
+        except OSError:
+            return entries
+        for name in names:
+            if name.endswith(SUFFIX):
+                path = os.path.join(self.directory, name)
+                try:
+                    status = os.stat(path)
+                except OSError:
+                    continue
+                entries.append((status.st_mtime, status.st_size, path))
+        entries.sort()
+        return entries
+
+    def prune(self, max_bytes=None):
+        """Deletes the least recently used files until the cache fits in max_bytes and returns how many were deleted."""
+        max_bytes = self.max_bytes if max_bytes is None else max_bytes
+        entries = self.entries()
+        total = sum(size for _, size, _ in entries)
+        removed = 0
+        for _, size, path in entries:
+            if total <= max_bytes:
+                break
+            if self.remove(path):
+                removed += 1
+            total -= size
+        return removed
+
+    def clear(self):
+        return self.prune(0)
+
+    @staticmethod
+    def remove(path):
+        try:
+            os.remove(path)
+            return True
+        except OSError:
+            return False
+
+
+def main(arguments=None):
+    parser = argparse.ArgumentParser(description="Inspect or prune the valolang compiled program cache.")
+    parser.add_argument("command", choices=["info", "prune", "clear"])
+    parser.add_argument("--dir", default=DEFAULT_DIRECTORY, help="cache directory")
+    parser.add_argument("--max-bytes", type=int, default=DEFAULT_MAX_BYTES, help="size cap used by prune")
+    options = parser.parse_args(arguments)
+
+    cache = ProgramCache(options.dir, options.max_bytes)
+    if options.command == "prune":
+        print(f"Removed {cache.prune()} files")
+    elif options.command == "clear":
+        print(f"Removed {cache.clear()} files")
+    entries = cache.entries()
+    print(f"{len(entries)} files, {sum(size for _, size, _ in entries)} bytes in {cache.directory}")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,85 @@
+from ast_utils import AstTransformer
+
+
+class Unset:
+    """Value of a frame slot whose variable has not been assigned yet"""
+    __slots__ = ()
+
+    def __repr__(self):
+        return "UNSET"
+
+
+UNSET = Unset()
+
+
+class Resolver(AstTransformer):
+    """Gives every variable a slot index in the frame of its function or of the global scope.
+
+    Follows the scoping rules of TypeChecker: a function body only sees its parameters and the
+    variables it declares, if and while blocks share the scope around them, and a variable must
+    be declared earlier in the source than where it is used. The resolved AST is the original
+    one with the slot appended to every node that names a variable, and the frame size appended
+    to every FUNCTION_DEF.
+
+    Given the node_positions of a TokenParser, resolved_positions maps the resolved statements
+    to the same source positions.
+    """
+    def __init__(self, node_positions=None):
+        self.scope = {}  # {variable name: slot index}
+        self.node_positions = node_positions
+        self.resolved_positions = {}
+
+    def resolve(self, ast, variables=()):
+        """Returns the resolved AST and the size of the global frame.
+
+        The named variables are treated as declared before the program and take the first slots.
+        """
+        self.scope = {name: slot for slot, name in enumerate(variables)}
+        self.resolved_positions = {}
+        return self.visit_block(ast), len(self.scope)
+
+    def visit_statement(self, node):
+        resolved = self.resolve_statement(node)
+        if self.node_positions is not None and id(node) in self.node_positions:
+            self.resolved_positions[id(resolved)] = self.node_positions[id(node)]
+        return resolved
+
+    def resolve_statement(self, node):
+        node_type = node[0]
+
+        if node_type == "FUNCTION_DEF":
+            _, name, params, body, return_type = node
+            outer_scope = self.scope
+            self.scope = {param[1]: slot for slot, param in enumerate(params)}
+            body = self.visit_function_body(body)
+            frame_size = len(self.scope)
+            self.scope = outer_scope
+            return node_type, name, params, body, return_type, frame_size
+
+        elif node_type in ("IDENTIFIER", "LIST_INDEX", "METHOD_CALL", "FUNCTION_CALL"):
+            return self.visit_expression(node)
+
+        node = self.rebuild(node)
+        if node_type == "VAR_DECLARATION":
+            # The value is resolved first, so "int x = x" does not see the new x
+            return node + (self.scope.setdefault(node[2], len(self.scope)),)
+        elif node_type == "ASSIGNMENT" or node_type == "INDEX_ASSIGNMENT":
+            return node + (self.slot(node[1]),)
+        return node
+
+    def visit_expression(self, node):
+        if node[0] == "FUNCTION_CALL" and node[1] == "parmap" and node[2] and node[2][0][0] == "IDENTIFIER":
+            # The first argument names a function, not a variable
+            return node[0], node[1], [node[2][0]] + [self.visit_expression(arg) for arg in node[2][1:]]
+        node = self.rebuild(node)
+        node_type = node[0]
+        if node_type == "IDENTIFIER" or node_type == "LIST_INDEX":
+            return node + (self.slot(node[1]),)
+        elif node_type == "METHOD_CALL":
+            return node + (self.slot(node[2]),)
+        return node
+
+    def slot(self, name):
+        if name not in self.scope:
+            raise NameError(f"Undefined variable '{name}'")
+        return self.scope[name]
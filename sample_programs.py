@@ -0,0 +1,240 @@
+import ast
+import os
+import re
+
+DIRECTORY = os.path.dirname(os.path.abspath(__file__))
+# A README example is a fenced code block right under a one-line title
+README_EXAMPLE = re.compile(r"^(\w[^\n]*)\n```\n(.*?)^```", re.MULTILINE | re.DOTALL)
+
+
+def documented_programs():
+    """Reads the programs shown in example.py and README.md from the files themselves, so they never drift apart."""
+    programs = {}
+    with open(os.path.join(DIRECTORY, "example.py"), encoding="utf-8") as file:
+        module = ast.parse(file.read())
+    for node in module.body:
+        if isinstance(node, ast.Assign) and isinstance(node.targets[0], ast.Name) and node.targets[0].id == "text":
+            programs["example"] = ast.literal_eval(node.value)
+
+    with open(os.path.join(DIRECTORY, "README.md"), encoding="utf-8") as file:
+        for title, source in README_EXAMPLE.findall(file.read()):
+            programs["readme_" + title.strip().lower().replace(" ", "_")] = source
+    return programs
+
+
+PROGRAMS = {
+    **documented_programs(),
+    "comments": """
+//regular comment
+
+/*
+Multiline comment
+*/
+
+/*
+Nested multiline comments are supported:
+  /*
+  Nested comment in here
+  */
+  // Another nested comment
+*/
+print("done")
+""",
+    "recursion": """
+int fib(int n)
+    if n < 2
+        return n
+    return fib(n - 1) + fib(n - 2)
+int i = 0
+while i < 12
+    print("fib({i}) = {fib(i)}")
+    i = i + 1
+""",
+    "nested_loops": """
+int total = 0
+int i = 0
+while i < 20
+    int j = 0
+    while j < 20
+        j = j + 1
+        if j == i
+            continue
+        total = total + (i * j)
+    if total > 20000
+        break
+    i = i + 1
+print(total)
+print(i)
+""",
+    "list_updates": """
+list<int> values = [5, 3, 8, 1, 9, 2]
+int sum(list<int> items)
+    int index = 0
+    int total = 0
+    while index < items.length()
+        total = total + items[index]
+        index = index + 1
+    return total
+int i = 0
+while i < values.length()
+    values[i] = values[i] * 2
+    i = i + 1
+print(values)
+print(sum(values))
+list<bool> flags = [true, false, true]
+flags[1] = true
+print(flags)
+""",
+    "undefined_function": """
+print("before")
+print(missing(1))
+""",
+    "strings": """
+int a = 3
+str s = "tab\t and \\"quotes\\" and 'single' }"
+print(s)
+print("quoted \\"{a}\\" and 'single' {a + 1} {s}")
+print("{a}{a}")
+""",
+    "constants": """
+int limit = 3 + 4
+str greeting = "Hello" + " " + "world"
+bool debug = false
+if debug
+    print("debugging")
+int i = 0
+while i < limit
+    i = i + 1
+    if i == 2
+        continue
+        print("never")
+    print("{greeting} {i} of {limit} {1 + 1} {debug}")
+int twice(int n)
+    int factor = 2
+    return n * factor
+    print("unreachable")
+print(twice(limit))
+if true
+    print("always")
+else
+    print("never")
+while false
+    print("never")
+int changing = 1
+changing = changing + 1
+print(changing)
+""",
+    "inlining": """
+int square(int n)
+    return n * n
+int difference(int a, int b)
+    return a - b
+int first(list<int> items)
+    return items[0]
+int unused(int n)
+    return n
+int countdown(int n)
+    if n < 1
+        return 0
+    return countdown(n - 1)
+void show(str text)
+    print(text)
+list<int> numbers = [7, 8]
+print(square(3) + square(difference(10, 4)))
+print(difference(square(2), square(3)))
+print(first(numbers) + countdown(3))
+print(square(first(numbers)) + difference(1, first(numbers)))
+show("done")
+""",
+    "tail_calls": """
+int sum_from(list<int> items, int index, int total)
+    if index == items.length()
+        return total
+    return sum_from(items, index + 1, total + items[index])
+int depth(int n)
+    if n == 0
+        return 0
+    return depth(n - 1) + 1
+void countdown(int n)
+    if n == 0
+        return
+    print(n)
+    return countdown(n - 1)
+list<int> values = [3, 1, 4, 1, 5, 9, 2, 6]
+print(sum_from(values, 0, 0))
+print(depth(40))
+countdown(3)
+""",
+    "templates": """
+int count = 3
+str name = "valo"
+print("{{literal}} and {{{count}}} braces")
+print("{ count * 2 } items for {name}, closing }} and lone } brace")
+print("no placeholders {{here}} at all")
+str opening = "a {{ b"
+str closing = "x }} y"
+print(opening, closing, "lone { brace")
+print("{count} {{ only opens and }} only closes")
+""",
+    "list_builtins": """
+list<int> numbers(int count)
+    return range(1, count + 1)
+int total(list<int> items)
+    return items.sum()
+list<int> values = numbers(6)
+values.append(10)
+print(values, total(values), values.min(), values.max())
+list<int> window = values.slice(1, 4)
+print(window, window.length())
+list<int> shuffled = [7, 2, 9, 4]
+shuffled.sort()
+print(shuffled, shuffled.contains(9), shuffled.index_of(4), shuffled.index_of(5))
+print(shuffled.add(1), shuffled.subtract(shuffled), shuffled.multiply(range(4)))
+list<str> words = ["pear", "fig", "apple"]
+words.sort()
+words.append("kiwi")
+print(words, words.index_of("kiwi"), words.contains("plum"))
+list<int> empty = range(0)
+print(empty.length(), empty.sum())
+print(empty.max())
+""",
+    "parmap": """
+int squares(int n)
+    int total = 0
+    int i = 0
+    while i < n
+        i = i + 1
+        total = total + (i * i)
+    return total
+int score(int n)
+    return squares(n) - n
+bool large(int n)
+    return n > 50
+list<int> numbers = range(1, 13)
+list<int> scores = parmap(score, numbers)
+print(scores, scores.sum())
+print(parmap(large, scores.slice(2, 6)))
+list<int> empty = range(0)
+print(parmap(score, empty))
+""",
+    "big_int_lists": """
+int big = 3000000000
+list<int> xs = [big, 2, 3]
+xs[0] = big * big * big
+xs.append(big * big)
+print(xs, xs.sum())
+list<int> numbers = range(4)
+numbers.append(big * big)
+numbers.sort()
+print(numbers, numbers.contains(big * big), numbers.index_of(big * big))
+list<int> squares = xs.multiply(xs)
+print(squares.max(), squares.slice(1, 3))
+""",
+    "invalid_parmap": """
+print("before")
+if false
+    list<int> skipped = parmap(1, [1, 2])
+print("after")
+list<int> failed = parmap(1, [1, 2])
+""",
+}
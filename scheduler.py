@@ -0,0 +1,142 @@
+import asyncio
+import time
+from collections import deque
+
+from bytecode import BytecodeCompiler
+from lexer import SinglePassLexer
+from token_parser import TokenParser
+from type_checker import TypeChecker
+from virtual_machine import VirtualMachine
+
+PENDING = "pending"
+FINISHED = "finished"
+FAILED = "failed"
+CANCELLED = "cancelled"
+
+
+class ScriptTask:
+    """One script run by a Scheduler, suspended between its time slices.
+
+    state is PENDING until the script returns (FINISHED), raises (FAILED, with the exception in
+    error) or is cancelled (CANCELLED). cpu_time is the time spent running it, over slices turns.
+    """
+    def __init__(self, name, code, priority, output, check_interval):
+        self.name = name
+        self.priority = priority
+        self.machine = VirtualMachine(output)
+        self.steps = self.machine.steps(code, check_interval)
+        self.state = PENDING
+        self.error = None
+        self.cpu_time = 0.0
+        self.slices = 0
+        self.done = asyncio.Event()
+
+    @property
+    def finished(self):
+        return self.state != PENDING
+
+    def finish(self, state, error=None):
+        self.state = state
+        self.error = error
+        self.done.set()
+
+    def cancel(self):
+        """Stops the script where it last yielded; returns False if it had already finished."""
+        if self.finished:
+            return False
+        self.steps.close()
+        self.finish(CANCELLED)
+        return True
+
+    async def wait(self):
+        """Waits until the script has finished, failed or been cancelled and returns the task."""
+        await self.done.wait()
+        return self
+
+    def __repr__(self):
+        return f"ScriptTask({self.name!r}, {self.state}, priority={self.priority})"
+
+
+class Scheduler:
+    """Runs many scripts on one thread by giving each a time slice in turn.
+
+    Every script runs on its own VirtualMachine, which yields after check_interval jumps and
+    calls, so a long loop cannot hold the thread: once a script has used time_slice seconds times
+    its priority, the next script gets its turn. A priority of 2 gets twice the time of a priority
+    of 1 per round, and no script waits more than one round. Between turns the scheduler awaits
+    asyncio.sleep(0), so other coroutines on the event loop keep running as well.
+
+    A ProgramCache can be passed to skip lexing, parsing and type checking of sources it has seen.
+    """
+    def __init__(self, time_slice=0.005, check_interval=100, cache=None):
+        self.time_slice = time_slice
+        self.check_interval = check_interval
+        self.cache = cache
+        self.tasks = deque()
+        self.task_count = 0
+        self.added = asyncio.Event()
+        self.stopping = False
+
+    def add(self, source, name=None, priority=1, output=None, type_check=True):
+        """Compiles the source and queues it as a ScriptTask that prints to output (sys.stdout if None)."""
+        if priority <= 0:
+            raise ValueError(f"Priority must be positive, got {priority}")
+        if self.cache is not None:
+            ast = self.cache.compile(source, type_check=type_check)
+        else:
+            ast = TokenParser(SinglePassLexer(source).tokenize()).parse()
+            if type_check:
+                TypeChecker().check(ast)
+        code = BytecodeCompiler().compile(ast)
+
+        self.task_count += 1
+        task = ScriptTask(name or f"task-{self.task_count}", code, priority, output, self.check_interval)
+        self.tasks.append(task)
+        self.added.set()
+        return task
+
+    def cancel(self, task):
+        return task.cancel()
+
+    def stop(self):
+        """Makes run() return after the current turn; unfinished tasks stay queued."""
+        self.stopping = True
+        self.added.set()
+
+    async def run(self, stop_when_idle=True):
+        """Runs the queued tasks until all have finished, or until stop() with stop_when_idle=False."""
+        self.stopping = False
+        while not self.stopping:
+            if not self.tasks:
+                if stop_when_idle:
+                    return
+                self.added.clear()
+                await self.added.wait()
+                continue
+            task = self.tasks.popleft()
+            if task.finished:  # Cancelled while queued
+                continue
+            self.run_slice(task)
+            if not task.finished:
+                self.tasks.append(task)
+            await asyncio.sleep(0)
+
+    def run_slice(self, task):
+        start = time.perf_counter()
+        deadline = start + self.time_slice * task.priority
+        steps = task.steps
+        try:
+            while True:
+                next(steps)
+                if time.perf_counter() >= deadline:
+                    break
+        except StopIteration:
+            task.finish(FINISHED)
+        except Exception as ex:
+            task.finish(FAILED, ex)
+        task.cpu_time += time.perf_counter() - start
+        task.slices += 1
+
+    def run_until_complete(self):
+        """Runs every queued task to the end on a new event loop."""
+        asyncio.run(self.run())
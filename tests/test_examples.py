@@ -0,0 +1,39 @@
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from check_engines import ENGINES, TYPED_ENGINES, check_program, run_engine  # noqa: E402
+from lexer import Lexer  # noqa: E402
+from sample_programs import PROGRAMS, documented_programs  # noqa: E402
+from token_parser import TokenParser  # noqa: E402
+from type_checker import TypeChecker  # noqa: E402
+
+
+class DocumentedExamplesTest(unittest.TestCase):
+    """Runs the programs of example.py and README.md through the Evaluator and the transpiled code."""
+    def test_examples_are_found(self):
+        programs = documented_programs()
+        self.assertIn("example", programs)
+        self.assertIn("readme_hello_world", programs)
+
+    def test_transpiled_code_prints_like_the_evaluator(self):
+        for name, source in documented_programs().items():
+            with self.subTest(name):
+                ast = TokenParser(Lexer(source).tokenize()).parse()
+                # The examples are valid programs, so the transpiler must not be skipped for them
+                TypeChecker().check(ast)
+                expected = run_engine(ENGINES["evaluator"], ast)
+                self.assertEqual(run_engine(TYPED_ENGINES["python"], ast), expected)
+
+
+class EnginesTest(unittest.TestCase):
+    def test_engines_print_the_same(self):
+        for name, source in PROGRAMS.items():
+            with self.subTest(name):
+                self.assertEqual(check_program(name, source), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,47 +1,77 @@
-from lexer import Lexer
+from array import array
+from collections import deque
+
+from language_token import TOKEN_CODES, TOKEN_TYPES
+from lexer import SinglePassLexer
 
 
 class TokenParser:
+    """Builds the tuple AST from tokens.
+
+    node_positions maps id(statement node) to the (line, column) of the statement's first token,
+    so tools such as the profiler can point back into the source without changing the AST layout.
+    BREAK and CONTINUE are shared constant tuples and have no position.
+    """
     TYPES = ["TYPE_INT", "TYPE_STRING", "TYPE_LIST", "TYPE_VOID", "TYPE_BOOL"]
     DEFAULT_VALUES = [("NUMBER","0"), ("STRING",""), ("LIST_LITERAL","[]"), None, ("BOOLEAN", "false")]
     def __init__(self, tokens):
         self.tokens = tokens
         self.pos = 0
+        self.placeholder_lexer = None  # Reused for every interpolation placeholder
+        self.node_positions = {}  # {id(statement node): (line, column)}
 
     def current_token(self):
         return self.tokens[self.pos] if self.pos < len(self.tokens) else None
 
-    def eat(self, token_type):
+    def current_type(self):
         token = self.current_token()
-        if token and token.type == token_type:
-            self.pos += 1
+        return token.type if token else None
+
+    def eat(self, token_type):
+        if self.current_type() == token_type:
+            token = self.current_token()
+            self.advance()
             return token
         else:
-            raise SyntaxError(f"Expected {token_type}, got {token}")
+            raise SyntaxError(f"Expected {token_type}, got {self.current_token()}")
+
+    def eat_value(self, token_type):
+        return self.eat(token_type).value
 
     def eat_any(self, token_types):
-        token = self.current_token()
-        if token and token.type in token_types:
-            self.pos += 1
+        if self.current_type() in token_types:
+            token = self.current_token()
+            self.advance()
             return token
         else:
-            raise SyntaxError(f"Expected {token_types}, got {token}")
+            raise SyntaxError(f"Expected {token_types}, got {self.current_token()}")
+
+    def advance(self):
+        self.pos += 1
 
     def peek(self, amount = 1):
         if self.pos + amount < len(self.tokens):
             return self.tokens[self.pos + amount]
         return None
 
+    def peek_type(self, amount=1):
+        token = self.peek(amount)
+        return token.type if token else None
+
+    def position(self):
+        token = self.current_token()
+        return (token.line, token.column) if token else None
+
     def parse(self):
         statements = []
-        while self.current_token() is not None and self.current_token().type != "DEDENT":
+        while self.current_type() not in (None, "DEDENT"):
             statements.append(self.statement())
         return statements
 
     def variable_declaration(self):
         type_token = self.eat_any(self.TYPES)
-        identifier = self.eat("IDENTIFIER").value
-        if self.current_token().type == "ASSIGN":
+        identifier = self.eat_value("IDENTIFIER")
+        if self.current_type() == "ASSIGN":
             self.eat("ASSIGN")
             value = self.expression()
         else:
@@ -49,14 +79,14 @@ class TokenParser:
         return "VAR_DECLARATION", type_token.value, identifier, value
 
     def assignment(self):
-        identifier = self.eat("IDENTIFIER").value
+        identifier = self.eat_value("IDENTIFIER")
         self.eat("ASSIGN")
         value = self.expression()
         return "ASSIGNMENT", identifier, value
 
     def function_definition(self):
         return_type = self.eat_any(self.TYPES).value
-        name = self.eat("IDENTIFIER").value
+        name = self.eat_value("IDENTIFIER")
         self.eat("LPAREN")
         parameters = self.parameter_list()
         self.eat("RPAREN")
@@ -67,41 +97,50 @@ class TokenParser:
 
     def parameter_list(self):
         parameters = []
-        while self.current_token().type != "RPAREN":
+        while self.current_type() != "RPAREN":
             parameter_type = self.eat_any(self.TYPES).value
-            parameter_name = self.eat("IDENTIFIER").value
+            parameter_name = self.eat_value("IDENTIFIER")
             parameters.append((parameter_type, parameter_name))
-            if self.current_token().type != "RPAREN":
+            if self.current_type() != "RPAREN":
                 self.eat("COMMA")
         return parameters
 
     def statement(self):
-        if self.current_token().type == "IF":
+        position = self.position()
+        node = self.unpositioned_statement()
+        if len(node) > 1:
+            self.node_positions[id(node)] = position
+        return node
+
+    def unpositioned_statement(self):
+        token_type = self.current_type()
+        if token_type == "IF":
             return self.if_statement()
-        elif self.current_token().type == "WHILE":
+        elif token_type == "WHILE":
             return self.while_statement()
-        elif self.current_token().type == "BREAK":
+        elif token_type == "BREAK":
             self.eat("BREAK")
             return "BREAK",
-        elif self.current_token().type == "CONTINUE":
+        elif token_type == "CONTINUE":
             self.eat("CONTINUE")
             return "CONTINUE",
-        elif self.current_token().type == "LBRACKET":
+        elif token_type == "LBRACKET":
             return self.list_literal()
-        elif self.current_token().type in self.TYPES:
-            if self.peek().type == "IDENTIFIER" and self.peek(2).type == "LPAREN":
+        elif token_type in self.TYPES:
+            if self.peek_type() == "IDENTIFIER" and self.peek_type(2) == "LPAREN":
                 return self.function_definition()
             else:
                 return self.variable_declaration()
-        elif self.current_token().type == "IDENTIFIER":
-            if self.peek().type == "ASSIGN":
+        elif token_type == "IDENTIFIER":
+            next_type = self.peek_type()
+            if next_type == "ASSIGN":
                 return self.assignment()
-            elif self.peek().type == "DOT":
+            elif next_type == "DOT":
                 return self.method_call()
-            elif self.peek().type == "LBRACKET":
+            elif next_type == "LBRACKET":
                 return self.index_assignment()
             return self.function_call()
-        elif self.current_token().type == "RETURN":
+        elif token_type == "RETURN":
             return self.return_statement()
         else:
             raise SyntaxError(f"Unexpected token {self.current_token()}")
@@ -116,7 +155,7 @@ class TokenParser:
 
         # Handle optional else block
         false_block = None
-        if self.current_token() and self.current_token().type == "ELSE":
+        if self.current_type() == "ELSE":
             self.eat("ELSE")
             self.eat("INDENT")
             false_block = self.parse()
@@ -137,7 +176,7 @@ class TokenParser:
     def return_statement(self):
         self.eat("RETURN")
 
-        if self.current_token() and self.current_token().type in {"NUMBER", "STRING", "IDENTIFIER", "LPAREN", "LBRACKET"}:
+        if self.current_type() in {"NUMBER", "STRING", "IDENTIFIER", "LPAREN", "LBRACKET"}:
             return_value = self.expression()
         else:
             return_value = None  # Allow return without a value
@@ -146,46 +185,49 @@ class TokenParser:
 
     def expression(self):
         node = self.term()
-        while self.current_token() and self.current_token().type == "OPERATOR":
-            op = self.eat("OPERATOR").value
+        while self.current_type() == "OPERATOR":
+            op = self.eat_value("OPERATOR")
             right = self.term()
             node = ("BIN_OP", op, node, right)
         return node
 
     def function_call(self):
-        name = self.eat("IDENTIFIER").value
+        name = self.eat_value("IDENTIFIER")
         self.eat("LPAREN")
         args = self.argument_list()
         self.eat("RPAREN")
         return "FUNCTION_CALL", name, args
 
     def term(self):
-        token = self.current_token()
-        if token.type == "NUMBER":
-            return "NUMBER", self.eat("NUMBER").value
-        elif token.type == "BOOLEAN":
-            return "BOOLEAN", self.eat("BOOLEAN").value
-        elif token.type == "LBRACKET":
+        token_type = self.current_type()
+        if token_type == "NUMBER":
+            return "NUMBER", self.eat_value("NUMBER")
+        elif token_type == "BOOLEAN":
+            return "BOOLEAN", self.eat_value("BOOLEAN")
+        elif token_type == "LBRACKET":
             return self.list_literal()
-        elif token.type == "IDENTIFIER":
+        elif token_type == "IDENTIFIER":
             # Look ahead to check if it's a function call
-            next_node = self.peek()
-            if next_node and next_node.type == "LPAREN":
+            next_type = self.peek_type()
+            if next_type == "LPAREN":
                 return self.function_call()
-            elif next_node and next_node.type == "LBRACKET":
+            elif next_type == "LBRACKET":
                 return self.list_indexing()
-            elif next_node and next_node.type == "DOT":
+            elif next_type == "DOT":
                 return self.method_call()
             else:
-                return "IDENTIFIER", self.eat("IDENTIFIER").value
-        elif token.type == "STRING":
+                return "IDENTIFIER", self.eat_value("IDENTIFIER")
+        elif token_type == "STRING":
             # Check if the string contains placeholders `{}` for interpolation
-            string_value = self.eat("STRING").value[1:-1]  # Remove quotes
-            if "{" in string_value and "}" in string_value:
-                return self.parse_interpolated_string(string_value)
+            line, column = self.position()
+            string_value = self.eat_value("STRING")[1:-1]  # Remove quotes
+            # A lone "{" with no closing brace stays a literal character, as it always has
+            if "}" in string_value or "{{" in string_value:
+                # Positions inside the string start after the opening quote
+                return self.parse_interpolated_string(string_value, line, column + 1)
             else:
                 return "STRING", string_value
-        elif token.type == "LPAREN":
+        elif token_type == "LPAREN":
             # Handle parentheses for grouping
             self.eat("LPAREN")
             expr = self.expression()
@@ -194,9 +236,9 @@ class TokenParser:
 
     def argument_list(self):
         args = []
-        if self.current_token().type != "RPAREN":  # Non-empty argument list
+        if self.current_type() != "RPAREN":  # Non-empty argument list
             args.append(self.expression())
-            while self.current_token() and self.current_token().type == "COMMA":
+            while self.current_type() == "COMMA":
                 self.eat("COMMA")
                 args.append(self.expression())
         return args
@@ -205,77 +247,155 @@ class TokenParser:
         self.eat("LBRACKET")
         elements = []
 
-        while self.current_token().type != "RBRACKET":
+        while self.current_type() != "RBRACKET":
             elements.append(self.expression())
-            if self.current_token().type == "COMMA":
+            if self.current_type() == "COMMA":
                 self.eat("COMMA")
 
         self.eat("RBRACKET")
         return "LIST_LITERAL", elements
 
     def list_indexing(self):
-        list_name = self.eat("IDENTIFIER")
+        list_name = self.eat_value("IDENTIFIER")
         self.eat("LBRACKET")
         index = self.expression()
         self.eat("RBRACKET")
-        return "LIST_INDEX", list_name.value, index
+        return "LIST_INDEX", list_name, index
 
     def index_assignment(self):
-        list_name = self.eat("IDENTIFIER")
+        list_name = self.eat_value("IDENTIFIER")
         self.eat("LBRACKET")
         index = self.expression()
         self.eat("RBRACKET")
         self.eat("ASSIGN")
         value = self.expression()
-        return "INDEX_ASSIGNMENT", list_name.value, index, value
+        return "INDEX_ASSIGNMENT", list_name, index, value
 
     def method_call(self):
-        object_name = self.eat("IDENTIFIER")
+        object_name = self.eat_value("IDENTIFIER")
         self.eat("DOT")
-        method = self.eat("IDENTIFIER")
+        method = self.eat_value("IDENTIFIER")
         self.eat("LPAREN")
-        value = self.expression()
+        args = self.argument_list()
         self.eat("RPAREN")
 
-        return "METHOD_CALL", method.value, object_name.value, value
+        return "METHOD_CALL", method, object_name, args
+
+    def parse_interpolated_string(self, string, line=0, column=0):
+        """Splits a string into literal parts and parsed placeholder expressions.
 
-    def parse_interpolated_string(self, string):
+        "{{" and "}}" stand for literal braces. line and column give the position of the string's
+        first character in the source, so errors in placeholders point into the source line.
+        """
         parts = []
-        current = ""
+        literal = []
         i = 0
+        length = len(string)
+
+        while i < length:
+            character = string[i]
+            if character in "{}" and string[i + 1:i + 2] == character:
+                literal.append(character)
+                i += 2
+            elif character == "{":
+                end = string.find("}", i + 1)
+                if end == -1:
+                    raise SyntaxError(
+                        f"Unclosed interpolation brace in string at line: {line}, column: {column + i}"
+                    )
+                if literal:
+                    parts.append("".join(literal))
+                    literal = []
+                parts.append(self.expression_from_string(string[i + 1:end], line, column + i + 1))
+                i = end + 1
+            else:
+                literal.append(character)
+                i += 1
 
-        while i < len(string):
-            if string[i] == "{":
-                # Flush the current literal part
-                if current:
-                    parts.append(current)
-                    current = ""
+        if literal:
+            parts.append("".join(literal))
+        if all(part.__class__ is str for part in parts):
+            # Only escaped braces, so the string is a plain literal
+            return "STRING", "".join(parts)
+        return "INTERPOLATED_STRING", parts
 
-                # Parse the embedded expression inside {}
-                i += 1
-                expr_start = i
-                while i < len(string) and string[i] != "}":
-                    i += 1
-                if i >= len(string):
-                    raise SyntaxError("Unclosed interpolation brace in string")
-
-                embedded_expr = string[expr_start:i]
-                parts.append(self.expression_from_string(embedded_expr))
-            else:
-                current += string[i]
-            i += 1
+    def expression_from_string(self, expression_code, line=0, column=0):
+        """Parses one placeholder expression, reporting positions as if it was lexed in its source line."""
+        if self.placeholder_lexer is None:
+            self.placeholder_lexer = SinglePassLexer()
+        lexer = self.placeholder_lexer
+        lexer.line = line
+        lexer.column = column
+        lexer.comment_depth = 0
+        tokens = lexer.tokenize_line(" " * column + expression_code)
 
-        # Flush the final literal part
-        if current:
-            parts.append(current)
+        expression = TokenParser(tokens).expression()  # Use `expression()` to get a single expression
+        if expression is None:
+            raise SyntaxError(f"Expected an expression in interpolation at line: {line}, column: {column}")
+        return expression
 
-        return "INTERPOLATED_STRING", parts
 
-    def expression_from_string(self, expression_code):
-        lexer = Lexer(expression_code)
-        tokens = lexer.tokenize()
+class StreamingTokenParser(TokenParser):
+    """Parses tokens pulled lazily from an iterator, e.g. Lexer.stream().
+
+    Only the lookahead window needed by peek(2) is kept in memory.
+    """
+    def __init__(self, tokens):
+        super().__init__(iter(tokens))
+        self.window = deque()
+
+    def current_token(self):
+        return self.peek(0)
+
+    def advance(self):
+        self.window.popleft()
+        self.pos += 1
+
+    def peek(self, amount=1):
+        while len(self.window) <= amount:
+            token = next(self.tokens, None)
+            if token is None:
+                return None
+            self.window.append(token)
+        return self.window[amount]
+
 
-        parser = TokenParser(tokens)
-        ast = parser.expression()  # Use `expression()` to get a single expression
+class CompactTokenParser(TokenParser):
+    """Parses a CompactTokens buffer by reading its type code and value arrays directly.
 
-        return ast
+    eat() and eat_value() compare type codes instead of names and never build a token object;
+    tokens are only built where a whole token is needed, e.g. by eat_any() and in error messages.
+    """
+    END = len(TOKEN_TYPES)  # Type code after the last token, which no token type matches
+    TYPE_NAMES = TOKEN_TYPES + (None,)
+
+    def __init__(self, tokens):
+        super().__init__(tokens)
+        self.types = tokens.types + array("B", [self.END])  # The end code saves a bounds check per lookup
+        self.length = len(tokens)
+
+    def current_type(self):
+        return self.TYPE_NAMES[self.types[self.pos]]
+
+    def peek_type(self, amount=1):
+        if self.pos + amount < self.length:
+            return TOKEN_TYPES[self.types[self.pos + amount]]
+        return None
+
+    def position(self):
+        if self.pos < self.length:
+            return self.tokens.lines[self.pos], self.tokens.columns[self.pos]
+        return None
+
+    def eat(self, token_type):
+        """Checks and skips one token; the grammar never uses the token, so none is built."""
+        if self.types[self.pos] != TOKEN_CODES[token_type]:
+            raise SyntaxError(f"Expected {token_type}, got {self.current_token()}")
+        self.pos += 1
+
+    def eat_value(self, token_type):
+        if self.types[self.pos] != TOKEN_CODES[token_type]:
+            raise SyntaxError(f"Expected {token_type}, got {self.current_token()}")
+        value = self.tokens.value_at(self.pos)
+        self.pos += 1
+        return value
@@ -0,0 +1,226 @@
+import sys
+
+from ast_utils import walk
+from lexer import Lexer
+from list_builtins import BUILTIN_FUNCTIONS, list_method
+from output_sinks import write_line
+from parallel import function_table
+from token_parser import TokenParser
+from type_checker import TypeChecker
+
+
+class PythonTranspiler:
+    """Translates a type-checked AST into an equivalent Python module.
+
+    Variables are prefixed with v_ and functions with f_ so valolang names never clash with
+    Python keywords or built-ins. List methods and built-in functions call into list_builtins,
+    which the generated module imports when it needs it. parmap calls parallel.parmap with the
+    function's AST, which the module embeds in PARMAP_FUNCTIONS for the worker processes.
+    """
+    INDENT = "    "
+    OPERATORS = {"+", "-", "*", "/", "<", ">", "==", "!="}
+
+    def __init__(self):
+        self.defined_functions = set()
+        self.uses_builtins = False
+        self.program = []
+        self.parmap_functions = {}  # {function name: function table for parallel.parmap}
+
+    def transpile(self, ast):
+        self.defined_functions = {node[1] for node in walk(ast) if node[0] == "FUNCTION_DEF"}
+        self.uses_builtins = False
+        self.program = ast
+        self.parmap_functions = {}
+        lines = []
+        self.emit_block(ast, 0, lines)
+        header = ["# Generated from valolang source"]
+        if self.uses_builtins:
+            header.append("import list_builtins")
+        if self.parmap_functions:
+            header.append("import parallel")
+            header.append(f"PARMAP_FUNCTIONS = {self.parmap_functions!r}")
+        return "\n".join(header + lines) + "\n"
+
+    def compile(self, ast, filename="<valolang>"):
+        return compile(self.transpile(ast), filename, "exec")
+
+    def evaluate(self, ast, output=None):
+        """Runs the generated module; with an output, its print calls write through output instead of sys.stdout."""
+        namespace = {"__name__": "__valolang__"}
+        if output is not None:
+            namespace["print"] = lambda *values: write_line(output, values)
+        exec(self.compile(ast), namespace)
+
+    def write_module(self, ast, path):
+        with open(path, "w", encoding="utf-8") as file:
+            file.write(self.transpile(ast))
+
+    def emit_block(self, nodes, depth, lines):
+        if not nodes:
+            lines.append(self.INDENT * depth + "pass")
+        for node in nodes:
+            self.emit_statement(node, depth, lines)
+
+    def emit_statement(self, node, depth, lines):
+        indent = self.INDENT * depth
+        node_type = node[0]
+
+        if node_type == "VAR_DECLARATION" or node_type == "ASSIGNMENT":
+            lines.append(f"{indent}{self.variable(node[-2])} = {self.expression(node[-1])}")
+
+        elif node_type == "INDEX_ASSIGNMENT":
+            _, list_name, index, value = node
+            lines.append(f"{indent}{self.variable(list_name)}[{self.expression(index)}] = {self.expression(value)}")
+
+        elif node_type == "IF":
+            _, condition, true_block, false_block = node
+            lines.append(f"{indent}if {self.expression(condition)}:")
+            self.emit_block(true_block, depth + 1, lines)
+            if false_block:
+                lines.append(f"{indent}else:")
+                self.emit_block(false_block, depth + 1, lines)
+
+        elif node_type == "WHILE":
+            _, condition, body = node
+            lines.append(f"{indent}while {self.expression(condition)}:")
+            self.emit_block(body, depth + 1, lines)
+
+        elif node_type == "RETURN":
+            lines.append(f"{indent}return {self.expression(node[1])}" if node[1] else f"{indent}return")
+
+        elif node_type == "BREAK":
+            lines.append(f"{indent}break")
+
+        elif node_type == "CONTINUE":
+            lines.append(f"{indent}continue")
+
+        elif node_type == "FUNCTION_DEF":
+            _, name, params, body, _ = node
+            parameters = ", ".join(self.variable(param[1]) for param in params)
+            lines.append(f"{indent}def {self.function(name)}({parameters}):")
+            # Functions defined inside a function are still global in valolang
+            nested_functions = self.nested_function_names(body)
+            if nested_functions:
+                lines.append(f"{indent}{self.INDENT}global {', '.join(nested_functions)}")
+            self.emit_block(body, depth + 1, lines)
+
+        else:
+            lines.append(f"{indent}{self.expression(node)}")
+
+    def expression(self, node):
+        node_type = node[0]
+
+        if node_type == "NUMBER":
+            return repr(float(node[1]) if "." in node[1] else int(node[1]))
+
+        elif node_type == "BOOLEAN":
+            return repr(node[1] == "true")
+
+        elif node_type == "STRING":
+            return repr(node[1])
+
+        elif node_type == "IDENTIFIER":
+            return self.variable(node[1])
+
+        elif node_type == "BIN_OP":
+            _, operator, left, right = node
+            if operator not in self.OPERATORS:
+                raise ValueError(f"Unknown operator: {operator}")
+            return f"({self.expression(left)} {operator} {self.expression(right)})"
+
+        elif node_type == "LIST_LITERAL":
+            return "[" + ", ".join(self.expression(element) for element in node[1]) + "]"
+
+        elif node_type == "LIST_INDEX":
+            _, list_name, index = node
+            return f"{self.variable(list_name)}[{self.expression(index)}]"
+
+        elif node_type == "METHOD_CALL":
+            _, method, object_name, args = node
+            if method == "length" and not args:
+                return f"len({self.variable(object_name)})"
+            function = list_method(method, len(args))
+            self.uses_builtins = True
+            arguments = "".join(f", {self.expression(arg)}" for arg in args)
+            return f"list_builtins.{function.__name__}({self.variable(object_name)}{arguments})"
+
+        elif node_type == "INTERPOLATED_STRING":
+            return self.interpolated_string(node[1])
+
+        elif node_type == "FUNCTION_CALL":
+            _, name, args = node
+            arguments = ", ".join(self.expression(arg) for arg in args)
+            if name == "print":
+                return f"print({arguments})"
+            if name == "parmap":
+                return self.parmap(args)
+            if name not in self.defined_functions and name in BUILTIN_FUNCTIONS:
+                self.uses_builtins = True
+                return f"list_builtins.{BUILTIN_FUNCTIONS[name].__name__}({arguments})"
+            return f"{self.function(name)}({arguments})"
+
+        else:
+            raise ValueError(f"Unknown node type: {node_type}")
+
+    def parmap(self, args):
+        if len(args) != 2 or args[0][0] != "IDENTIFIER":
+            raise TypeError("parmap expects a function name and a list")
+        name = args[0][1]
+        if name not in self.parmap_functions:
+            self.parmap_functions[name] = function_table(self.program, name)
+        return (f"parallel.parmap({name!r}, {self.expression(args[1])}, PARMAP_FUNCTIONS[{name!r}], "
+                f"{self.function(name)})")
+
+    def interpolated_string(self, parts):
+        pieces = [self.expression(part) if isinstance(part, tuple) else part for part in parts]
+        expressions = [piece for piece, part in zip(pieces, parts) if isinstance(part, tuple)]
+
+        # Before Python 3.12 f-string placeholders cannot contain quotes or backslashes
+        if any('"' in code or "\\" in code for code in expressions):
+            return "''.join([" + ", ".join(
+                f"str({piece})" if isinstance(part, tuple) else repr(part) for piece, part in zip(pieces, parts)
+            ) + "])"
+
+        body = "".join(
+            f"{{{piece}}}" if isinstance(part, tuple) else self.escape_f_string_literal(part)
+            for piece, part in zip(pieces, parts)
+        )
+        return f'f"{body}"'
+
+    @staticmethod
+    def escape_f_string_literal(text):
+        for character, escaped in (("\\", "\\\\"), ('"', '\\"'), ("\t", "\\t"), ("\r", "\\r"),
+                                   ("{", "{{"), ("}", "}}")):
+            text = text.replace(character, escaped)
+        return text
+
+    def nested_function_names(self, body):
+        names = []
+        for node in body:
+            if node[0] == "FUNCTION_DEF":
+                names.append(self.function(node[1]))
+            elif node[0] == "IF":
+                names.extend(self.nested_function_names(node[2]))
+                names.extend(self.nested_function_names(node[3] or []))
+            elif node[0] == "WHILE":
+                names.extend(self.nested_function_names(node[2]))
+        return names
+
+    @staticmethod
+    def variable(name):
+        return f"v_{name}"
+
+    @staticmethod
+    def function(name):
+        return f"f_{name}"
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 3:
+        print("Usage: python transpiler.py <source file> <output .py file>")
+        sys.exit(2)
+
+    with open(sys.argv[1], encoding="utf-8") as source_file:
+        program = TokenParser(Lexer(source_file.read()).tokenize()).parse()
+    TypeChecker().check(program)
+    PythonTranspiler().write_module(program, sys.argv[2])
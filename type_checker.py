@@ -1,11 +1,16 @@
+from memoization import find_pure_functions
+
+
 class TypeChecker:
     def __init__(self):
         self.scope = {}
         self.function_signatures = {}
         self.current_function = None
         self.loop_depth = 0
+        self.pure_functions = set()
 
     def check(self, ast):
+        self.pure_functions = find_pure_functions(ast)
         for stmt in ast:
             self.check_statement(stmt)
 
@@ -36,6 +41,9 @@ class TypeChecker:
         elif stmt_type == "FUNCTION_CALL":
             self.check_function_call(stmt)
 
+        elif stmt_type == "METHOD_CALL":
+            self.check_method_call(stmt)
+
         elif stmt_type == "EXPRESSION_STATEMENT":
             self.check_expression(stmt["expression"])
 
@@ -71,6 +79,8 @@ class TypeChecker:
         var_name = stmt[1]
         if var_name not in self.scope:
             raise TypeError(f"Undefined variable: {var_name}")
+        if not self.scope[var_name].startswith("list<"):
+            raise TypeError(f"Cannot index {var_name} of type {self.scope[var_name]}")
 
         expected_type = self.scope[var_name][5:-1]
         value_type = self.check_expression(stmt[3])
@@ -140,6 +150,12 @@ class TypeChecker:
         if func_name == "print":
             return "void"
 
+        if func_name == "parmap":
+            return self.check_parmap_call(stmt)
+
+        if func_name == "range" and func_name not in self.function_signatures:
+            return self.check_range_call(stmt)
+
         if func_name not in self.function_signatures:
             raise TypeError(f"Undefined function: {func_name}")
 
@@ -155,12 +171,85 @@ class TypeChecker:
                 raise TypeError(f"Argument type mismatch for {func_name}: Expected {expected_type}, got {arg_type}")
         return self.function_signatures[func_name]["return_type"]
 
+    def check_range_call(self, stmt):
+        given_args = stmt[2]
+        if not 1 <= len(given_args) <= 2:
+            raise TypeError(f"Function range expects 1 or 2 arguments, got {len(given_args)}")
+
+        for arg_expr in given_args:
+            arg_type = self.check_expression(arg_expr)
+            if arg_type != "int":
+                raise TypeError(f"Argument type mismatch for range: Expected int, got {arg_type}")
+        return "list<int>"
+
+    def check_parmap_call(self, stmt):
+        given_args = stmt[2]
+        if len(given_args) != 2:
+            raise TypeError(f"Function parmap expects 2 arguments, got {len(given_args)}")
+        if given_args[0][0] != "IDENTIFIER":
+            raise TypeError("The first argument of parmap must be a function name")
+
+        func_name = given_args[0][1]
+        if func_name not in self.function_signatures:
+            raise TypeError(f"Undefined function: {func_name}")
+        if func_name not in self.pure_functions:
+            raise TypeError(f"Function {func_name} passed to parmap must be pure")
+        expected_params = self.function_signatures[func_name]["params"]
+        if len(expected_params) != 1:
+            raise TypeError(f"Function {func_name} passed to parmap must take 1 argument, got {len(expected_params)}")
+
+        list_type = self.check_expression(given_args[1])
+        if list_type != f"list<{expected_params[0]}>":
+            raise TypeError(f"Argument type mismatch for parmap: Expected list<{expected_params[0]}>, got {list_type}")
+        return f"list<{self.function_signatures[func_name]['return_type']}>"
+
     def check_method_call(self, stmt):
         method_name = stmt[1]
-        if method_name == "length":
+        object_name = stmt[2]
+        given_args = stmt[3]
+        if object_name not in self.scope:
+            raise TypeError(f"Undefined variable: {object_name}")
+        object_type = self.scope[object_name]
+
+        if method_name == "length" and not given_args:
             return "int"
+        if not object_type.startswith("list<"):
+            raise TypeError(f"Method {method_name} expects a list, got {object_type}")
+        element_type = object_type[5:-1]
+
+        # {method: (parameter types, return type)}, where a parameter may accept several types
+        signatures = {
+            "append": ([element_type], "void"),
+            "slice": (["int", "int"], object_type),
+            "min": ([], element_type),
+            "max": ([], element_type),
+            "sort": ([], "void"),
+            "contains": ([element_type], "bool"),
+            "index_of": ([element_type], "int"),
+        }
+        integer_signatures = {
+            "sum": ([], "int"),
+            "add": ([("int", "list<int>")], "list<int>"),
+            "subtract": ([("int", "list<int>")], "list<int>"),
+            "multiply": ([("int", "list<int>")], "list<int>"),
+        }
+        if method_name in integer_signatures:
+            if element_type != "int":
+                raise TypeError(f"Method {method_name} expects a list<int>, got {object_type}")
+            expected_params, return_type = integer_signatures[method_name]
+        elif method_name in signatures:
+            expected_params, return_type = signatures[method_name]
+        else:
+            raise TypeError(f"Undefined method: {method_name}")
+
+        if len(expected_params) != len(given_args):
+            raise TypeError(f"Method {method_name} expects {len(expected_params)} arguments, got {len(given_args)}")
 
-        raise TypeError(f"Undefined method: {method_name}")
+        for (expected_type, arg_expr) in zip(expected_params, given_args):
+            arg_type = self.check_expression(arg_expr)
+            if arg_type not in (expected_type if isinstance(expected_type, tuple) else (expected_type,)):
+                raise TypeError(f"Argument type mismatch for {method_name}: Expected {expected_type}, got {arg_type}")
+        return return_type
 
     def check_expression(self, expr):
         expr_type = expr[0]
@@ -188,6 +277,17 @@ class TypeChecker:
                 raise TypeError(f"Undefined variable: {var_name}")
             return self.scope[var_name]
 
+        elif expr_type == "LIST_INDEX":
+            var_name = expr[1]
+            if var_name not in self.scope:
+                raise TypeError(f"Undefined variable: {var_name}")
+            if not self.scope[var_name].startswith("list<"):
+                raise TypeError(f"Cannot index {var_name} of type {self.scope[var_name]}")
+            index_type = self.check_expression(expr[2])
+            if index_type != "int":
+                raise TypeError(f"List index must be an integer, got {index_type}")
+            return self.scope[var_name][5:-1]
+
         elif expr_type == "BIN_OP":
             left_type = self.check_expression(expr[2])
             right_type = self.check_expression(expr[3])
@@ -0,0 +1,234 @@
+from array import array
+
+
+class ListBehaviour:
+    """Makes a typed list print, compare and concatenate like the plain list it replaces."""
+    __slots__ = ()
+
+    def __repr__(self):
+        return repr(list(self))
+
+    def __eq__(self, other):
+        if isinstance(other, (list, ListBehaviour)):
+            return list(self) == list(other)
+        return NotImplemented
+
+    def __ne__(self, other):
+        result = self.__eq__(other)
+        return result if result is NotImplemented else not result
+
+    __hash__ = None
+
+    def __add__(self, other):
+        if isinstance(other, (list, ListBehaviour)):
+            return list(self) + list(other)
+        return NotImplemented
+
+    def __radd__(self, other):
+        if isinstance(other, list):
+            return other + list(self)
+        return NotImplemented
+
+    def index(self, value):
+        for index, element in enumerate(self):
+            if element == value:
+                return index
+        raise ValueError(f"{value!r} is not in list")
+
+
+def check_index(index, length):
+    """Returns a non-negative index, raising the same errors as list indexing."""
+    if index.__class__ is not int:
+        if not isinstance(index, int):
+            raise TypeError(f"list indices must be integers, not {type(index).__name__}")
+        index = int(index)
+    if index < 0:
+        index += length
+    if not 0 <= index < length:
+        raise IndexError("list index out of range")
+    return index
+
+
+class IntList(ListBehaviour):
+    """list<int> stored as 64-bit machine integers instead of a list of int objects.
+
+    values is an array("q") until a value that does not fit in 64 bits is stored; from then on it
+    is a plain list, because valolang ints are unbounded.
+    """
+    __slots__ = ("values",)
+
+    def __init__(self, values=()):
+        if not isinstance(values, (list, tuple, range, array)):
+            values = list(values)
+        try:
+            self.values = array("q", values)
+        except OverflowError:
+            self.values = list(values)
+
+    def __len__(self):
+        return len(self.values)
+
+    def __getitem__(self, index):
+        return self.values[index]
+
+    def __setitem__(self, index, value):
+        try:
+            self.values[index] = value
+        except OverflowError:
+            self.values = self.values.tolist()
+            self.values[index] = value
+
+    def __iter__(self):
+        return iter(self.values)
+
+    def __contains__(self, value):
+        return value in self.values
+
+    def append(self, value):
+        try:
+            self.values.append(value)
+        except OverflowError:
+            self.values = self.values.tolist()
+            self.values.append(value)
+
+    def extend(self, values):
+        values = list(values)
+        try:
+            self.values.extend(values)
+        except OverflowError:
+            self.values = self.values.tolist()
+            self.values.extend(values)
+
+    def index(self, value):
+        try:
+            return self.values.index(value)
+        except ValueError:
+            raise ValueError(f"{value!r} is not in list") from None
+
+    def sort(self):
+        if self.values.__class__ is array:
+            self.values = array("q", sorted(self.values))
+        else:
+            self.values.sort()
+
+
+class BoolList(ListBehaviour):
+    """list<bool> packed eight values to a byte."""
+    __slots__ = ("bits", "length")
+
+    def __init__(self, values=()):
+        self.bits = bytearray()
+        self.length = 0
+        for value in values:
+            self.append(value)
+
+    def append(self, value):
+        if value.__class__ is not bool:
+            raise TypeError(f"list<bool> elements must be bool, not {type(value).__name__}")
+        index = self.length
+        if index & 7 == 0:
+            self.bits.append(0)
+        if value:
+            self.bits[index >> 3] |= 1 << (index & 7)
+        self.length = index + 1
+
+    def __len__(self):
+        return self.length
+
+    def __getitem__(self, index):
+        index = check_index(index, self.length)
+        return bool(self.bits[index >> 3] & (1 << (index & 7)))
+
+    def __setitem__(self, index, value):
+        if value.__class__ is not bool:
+            raise TypeError(f"list<bool> elements must be bool, not {type(value).__name__}")
+        index = check_index(index, self.length)
+        if value:
+            self.bits[index >> 3] |= 1 << (index & 7)
+        else:
+            self.bits[index >> 3] &= ~(1 << (index & 7))
+
+    def __iter__(self):
+        bits = self.bits
+        for index in range(self.length):
+            yield bool(bits[index >> 3] & (1 << (index & 7)))
+
+    def sort(self):
+        length = self.length
+        false_count = length - sum(self)
+        self.bits = bytearray()
+        self.length = 0
+        for index in range(length):
+            self.append(index >= false_count)
+
+
+class StrList(ListBehaviour):
+    """list<str> stored as indexes into a table holding each distinct string once."""
+    __slots__ = ("indexes", "strings", "string_indexes")
+
+    def __init__(self, values=()):
+        self.strings = []
+        self.string_indexes = {}
+        self.indexes = array("I", map(self.intern, values))
+
+    def intern(self, value):
+        index = self.string_indexes.get(value)
+        if index is None:
+            index = self.string_indexes[value] = len(self.strings)
+            self.strings.append(value)
+        return index
+
+    def __len__(self):
+        return len(self.indexes)
+
+    def __getitem__(self, index):
+        return self.strings[self.indexes[check_index(index, len(self.indexes))]]
+
+    def __setitem__(self, index, value):
+        if value.__class__ is not str:
+            raise TypeError(f"list<str> elements must be str, not {type(value).__name__}")
+        self.indexes[check_index(index, len(self.indexes))] = self.intern(value)
+
+    def __iter__(self):
+        strings = self.strings
+        return (strings[index] for index in self.indexes)
+
+    def __contains__(self, value):
+        index = self.string_indexes.get(value) if value.__class__ is str else None
+        return index is not None and index in self.indexes
+
+    def append(self, value):
+        if value.__class__ is not str:
+            raise TypeError(f"list<str> elements must be str, not {type(value).__name__}")
+        self.indexes.append(self.intern(value))
+
+    def index(self, value):
+        if value in self:
+            return self.indexes.index(self.string_indexes[value])
+        raise ValueError(f"{value!r} is not in list")
+
+    def sort(self):
+        self.indexes = array("I", sorted(self.indexes, key=self.strings.__getitem__))
+
+
+TYPED_LISTS = {
+    "list<int>": (IntList, int),
+    "list<bool>": (BoolList, bool),
+    "list<str>": (StrList, str),
+}
+
+
+def typed_list(type_name, values):
+    """Returns values in the compact storage for a declared list type.
+
+    The plain list is returned unchanged if the type has no compact storage or if a value does
+    not have the element type, which only happens in programs that were not type-checked.
+    """
+    storage = TYPED_LISTS.get("".join(type_name.split()))
+    if storage is None:
+        return values
+    list_class, element_type = storage
+    for value in values:
+        if value.__class__ is not element_type:
+            return values
+    return list_class(values)
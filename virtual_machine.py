@@ -0,0 +1,215 @@
+import sys
+
+from bytecode import (
+    ADD, BUILD_LIST, CALL, CALL_METHOD, DEFINE_FUNCTION, DIVIDE, EQUAL, FORMAT, GREATER, JUMP, LENGTH, LESS, LOAD_CONST,
+    LOAD_FUNCTION, LOAD_INDEX, LOAD_NAME, MULTIPLY, NOT_EQUAL, PARALLEL_MAP, POP, POP_JUMP_IF_FALSE, PRINT, RAISE,
+    RETURN_NONE, RETURN_VALUE, STORE_INDEX, STORE_NAME, SUBTRACT, TAIL_CALL, BytecodeCompiler, CodeObject,
+)
+from list_builtins import BUILTIN_FUNCTIONS, list_method
+from output_sinks import write_line
+from parallel import parmap
+
+
+class VirtualMachine:
+    """Executes bytecode with an explicit value stack and frame stack instead of recursing on the Python stack.
+
+    Recursion depth is only limited by memory, and tail calls replace the caller's frame.
+    """
+    def __init__(self, output=None):
+        self.functions = {}  # Function table: {name: CodeObject}
+        self.output = output  # OutputSink or file that print writes to, sys.stdout if None
+
+    def evaluate(self, ast):
+        self.run(BytecodeCompiler().compile(ast))
+
+    def run(self, code):
+        for _ in self.steps(code, sys.maxsize):
+            pass
+
+    def steps(self, code, slice_size):
+        """Returns a generator that runs the code and yields after every slice_size jumps and calls.
+
+        Every loop iteration ends with a jump and every recursion goes through a call, so no
+        program runs long between two yields. Closing the generator abandons the run.
+        """
+        functions = self.functions
+        output = self.output
+        ticks = slice_size
+        stack = []
+        frames = []  # Suspended callers: (code, pc, variables)
+        variables = {}
+        ops, args, consts, names = code.ops, code.args, code.consts, code.names
+        pc = 0
+
+        while True:
+            op = ops[pc]
+            arg = args[pc]
+            pc += 1
+
+            if op == LOAD_NAME:
+                name = names[arg]
+                if name not in variables:
+                    raise NameError(f"Undefined variable '{name}'")
+                stack.append(variables[name])
+
+            elif op == LOAD_CONST:
+                stack.append(consts[arg])
+
+            elif op == STORE_NAME:
+                variables[names[arg]] = stack.pop()
+
+            elif op == POP_JUMP_IF_FALSE:
+                if not stack.pop():
+                    pc = arg
+
+            elif op == JUMP:
+                pc = arg
+                ticks -= 1
+                if not ticks:
+                    ticks = slice_size
+                    yield
+
+            elif op == ADD:
+                right = stack.pop()
+                stack[-1] = stack[-1] + right
+
+            elif op == SUBTRACT:
+                right = stack.pop()
+                stack[-1] = stack[-1] - right
+
+            elif op == MULTIPLY:
+                right = stack.pop()
+                stack[-1] = stack[-1] * right
+
+            elif op == LESS:
+                right = stack.pop()
+                stack[-1] = stack[-1] < right
+
+            elif op == GREATER:
+                right = stack.pop()
+                stack[-1] = stack[-1] > right
+
+            elif op == EQUAL:
+                right = stack.pop()
+                stack[-1] = stack[-1] == right
+
+            elif op == NOT_EQUAL:
+                right = stack.pop()
+                stack[-1] = stack[-1] != right
+
+            elif op == DIVIDE:
+                right = stack.pop()
+                stack[-1] = stack[-1] / right
+
+            elif op == POP:
+                stack.pop()
+
+            elif op == LOAD_FUNCTION:
+                name, arg_count = consts[arg]
+                if name not in functions:
+                    if name in BUILTIN_FUNCTIONS:
+                        stack.append(BUILTIN_FUNCTIONS[name])
+                        continue
+                    raise NameError(f"Undefined function '{name}'")
+                function = functions[name]
+                if len(function.params) != arg_count:
+                    raise TypeError(f"Function '{name}' expects {len(function.params)} arguments, got {arg_count}")
+                stack.append(function)
+
+            elif op == CALL:
+                arg_values = stack[len(stack) - arg:]
+                del stack[len(stack) - arg:]
+                function = stack.pop()
+                if function.__class__ is not CodeObject:
+                    stack.append(function(*arg_values))
+                    continue
+                frames.append((code, pc, variables))
+                code = function
+                ops, args, consts, names = code.ops, code.args, code.consts, code.names
+                variables = dict(zip(code.params, arg_values))
+                pc = 0
+                ticks -= 1
+                if not ticks:
+                    ticks = slice_size
+                    yield
+
+            elif op == TAIL_CALL:
+                arg_values = stack[len(stack) - arg:]
+                del stack[len(stack) - arg:]
+                function = stack.pop()
+                if function.__class__ is not CodeObject:
+                    # A built-in runs at once, and its result is returned like RETURN_VALUE would
+                    stack.append(function(*arg_values))
+                    if not frames:
+                        return
+                    code, pc, variables = frames.pop()
+                    ops, args, consts, names = code.ops, code.args, code.consts, code.names
+                    continue
+                code = function
+                ops, args, consts, names = code.ops, code.args, code.consts, code.names
+                variables = dict(zip(code.params, arg_values))
+                pc = 0
+                ticks -= 1
+                if not ticks:
+                    ticks = slice_size
+                    yield
+
+            elif op == RETURN_VALUE or op == RETURN_NONE:
+                if not frames:
+                    return
+                if op == RETURN_NONE:
+                    stack.append(None)
+                code, pc, variables = frames.pop()
+                ops, args, consts, names = code.ops, code.args, code.consts, code.names
+
+            elif op == LOAD_INDEX:
+                index = stack.pop()
+                stack.append(variables[names[arg]][index])
+
+            elif op == STORE_INDEX:
+                index = stack.pop()
+                value = stack.pop()
+                variables[names[arg]][index] = value
+
+            elif op == LENGTH:
+                stack.append(len(variables[names[arg]]))
+
+            elif op == CALL_METHOD:
+                method, object_name, arg_count = consts[arg]
+                values = stack[len(stack) - arg_count:]
+                del stack[len(stack) - arg_count:]
+                stack.append(list_method(method, arg_count)(variables[object_name], *values))
+
+            elif op == PARALLEL_MAP:
+                name, parallel_functions = consts[arg]
+                if name not in functions:
+                    raise NameError(f"Undefined function '{name}'")
+                # The function is pure, so the Evaluator that runs it in parallel.parmap gives the same results
+                stack[-1] = parmap(name, stack[-1], parallel_functions)
+
+            elif op == BUILD_LIST:
+                values = stack[len(stack) - arg:]
+                del stack[len(stack) - arg:]
+                stack.append(values)
+
+            elif op == FORMAT:
+                values = stack[len(stack) - arg:]
+                del stack[len(stack) - arg:]
+                stack.append("".join([str(value) for value in values]))
+
+            elif op == PRINT:
+                values = stack[len(stack) - arg:]
+                del stack[len(stack) - arg:]
+                write_line(output, values)
+                stack.append(None)
+
+            elif op == DEFINE_FUNCTION:
+                function = consts[arg]
+                functions[function.name] = function
+
+            elif op == RAISE:
+                exception_class, message = consts[arg]
+                raise exception_class(message)
+
+            else:
+                raise ValueError(f"Unknown opcode: {op}")